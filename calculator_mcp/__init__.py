@@ -0,0 +1,7 @@
+"""Personal Calculator MCP: server and client cores shared by every transport.
+
+서버(`server.py`)와 클라이언트(`client.py`, `client_cli.py`, `client_react.py`)는 이
+패키지 하나에만 있고, stdio / SSE / streamable HTTP / memory 중 어떤 transport를 쓸지, 또는 MCP 없이
+도구 함수를 직접 부르는 embedded 모드를 쓸지는 `MCP_TRANSPORT`로 고른다
+(`mcp_session.open_connection`).
+"""
@@ -0,0 +1,103 @@
+# agent_client.py
+"""Connection + ReAct agent lifecycle shared by the client scripts.
+
+연결, 모델 선택, 도구 로드(출력 예산 적용), 에이전트 생성, 죽은 서버 재연결, 종료를
+한 곳에서 처리한다. 각 스크립트의 `MCPClient`는 이 클래스를 상속하고 출력 방식
+(`ask`, `ask_with_streaming`, CLI 스트리밍 출력)만 더한다.
+
+CLI가 프롬프트를 먼저 띄울 수 있도록 langchain / langgraph / mcp는 처음 필요할 때 로드한다.
+
+    async with MCPClient() as client:
+        async for event in client.ask_stream("5 + 3"):
+            ...
+"""
+import os
+
+
+class AgentClient:
+    def __init__(self, model=None, transport=None, transport_name=None):
+        self.model = model
+        # transport(팩토리)를 주지 않으면 transport_name 또는 MCP_TRANSPORT(기본 stdio)로 선택
+        self.transport = transport
+        self.transport_name = transport_name
+
+        self.connection = None
+        self.agent = None
+        self.is_running = False
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+    async def start(self):
+        """MCP 세션 시작"""
+        if self.is_running:
+            print("⚠️ 이미 실행 중입니다!")
+            return
+
+        await self._open()
+        self.is_running = True
+
+    async def _open(self):
+        if self.model is None:
+            self.model = self._select_model()
+        if self.connection is None:
+            self.connection = self._open_connection()
+        # transport 연결 + MCP 세션 (실패/취소 시 연결은 MCPConnection이 정리)
+        await self._connect()
+
+    def _select_model(self):
+        from .model_router import select_model
+
+        return select_model(os.getenv("MODEL_NAME"))
+
+    def _open_connection(self):
+        from .mcp_session import MCPConnection, open_connection
+
+        if self.transport is not None:
+            return MCPConnection(self.transport)
+        return open_connection(self.transport_name)
+
+    async def _connect(self):
+        from .tool_budget import apply_output_budget
+
+        # 연결 + MCP 도구 변환 (embedded면 서버 함수를 직접 래핑)
+        tools = apply_output_budget(await self.connection.load_tools())
+        self.agent = self._create_agent(tools)
+
+    def _create_agent(self, tools):
+        from langgraph.prebuilt import create_react_agent
+        from .message_state import compact_model_input
+
+        return create_react_agent(self.model, tools, pre_model_hook=compact_model_input)
+
+    async def _ensure_connected(self):
+        # 서버가 죽어 연결이 정리되었으면 다시 연결하고 에이전트를 새 세션으로 재구성
+        if not self.connection.alive:
+            print("🔄 MCP 서버 재연결 중...")
+            await self._connect()
+
+    async def ask_stream(self, message: str):
+        """에이전트에게 질문하고 토큰/도구 이벤트를 생성되는 대로 전달
+
+        마지막 이벤트는 {"kind": "done", "answer", "ttft", "total"}
+        """
+        from .streaming import stream_answer
+
+        if not self.is_running:
+            yield {"kind": "done", "answer": "❌ 먼저 start()를 실행하세요!", "ttft": None, "total": 0.0}
+            return
+
+        await self._ensure_connected()
+        async for event in stream_answer(self.agent, {"messages": message}):
+            yield event
+
+    async def stop(self):
+        if self.connection:
+            await self.connection.aclose()
+
+        self.is_running = False
+        print("✅ MCP 세션이 종료되었습니다!")
@@ -0,0 +1,78 @@
+# client.py
+import asyncio
+from .agent_client import AgentClient
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class MCPClient(AgentClient):
+    async def _open(self):
+        print("🚀 MCP 서버 연결 중...")
+        await super()._open()
+        print("✅ MCP 세션이 시작되었습니다!\n")
+
+    async def ask(self, message: str, show_message=True) -> str:
+        """에이전트에게 질문"""
+        if not self.is_running:
+            return "❌ 먼저 start()를 실행하세요!"
+
+        if show_message:
+            print(f"💬 질문: {message}")
+
+        async for event in self.ask_stream(message):
+            if event["kind"] == "done":
+                result = event["answer"]
+
+        if show_message:
+            print(f"🤖 답변: {result}")
+            print(f"⏱️ TTFT {event['ttft'] or 0:.2f}s, 전체 {event['total']:.2f}s\n")
+
+        return result
+
+
+async def main():
+    """메인 시나리오"""
+    # async with: 시작에 실패하거나 도중에 취소되어도 연결과 서버 프로세스를 정리
+    async with MCPClient() as client:
+        # 시나리오 1: 이름 설정
+        print("=" * 50)
+        print("📝 시나리오 1: 이름 설정")
+        print("=" * 50)
+        await client.ask("내 이름은 철수야")
+
+        # 시나리오 2: 계산하기
+        print("=" * 50)
+        print("🧮 시나리오 2: 계산하기")
+        print("=" * 50)
+        await client.ask("5 + 3을 계산해줘")
+        await client.ask("10 × 2를 계산해줘")
+        await client.ask("20 - 5를 계산해줘")
+
+        # 시나리오 3: 기록 확인
+        print("=" * 50)
+        print("📊 시나리오 3: 기록 확인")
+        print("=" * 50)
+        await client.ask("내 계산 기록을 보여줘")
+
+        # 시나리오 4: 통계 확인
+        print("=" * 50)
+        print("📈 시나리오 4: 통계 확인")
+        print("=" * 50)
+        await client.ask("통계를 보여줘")
+
+        # 시나리오 5: 누적 합계
+        print("=" * 50)
+        print("💰 시나리오 5: 누적 합계")
+        print("=" * 50)
+        await client.ask("지금까지 계산한 결과의 총합은?")
+
+        # 시나리오 6: 이름 확인
+        print("=" * 50)
+        print("👤 시나리오 6: 이름 확인")
+        print("=" * 50)
+        await client.ask("내 이름이 뭐야?")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
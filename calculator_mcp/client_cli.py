@@ -0,0 +1,235 @@
+# client_cli.py
+import asyncio
+import os
+import signal
+import threading
+import time
+from dotenv import load_dotenv
+from .agent_client import AgentClient
+
+# langchain / langgraph / mcp는 import 비용이 커서 AgentClient가 start()에서 처음 필요할 때 로드
+# (프롬프트를 먼저 띄우고 무거운 모듈은 백그라운드에서 준비)
+
+load_dotenv()
+
+# 답변을 토큰 단위로 바로 출력 (0이면 완성된 답변만 출력)
+STREAM = os.getenv("CLI_STREAM", "1") != "0"
+# 답변마다 첫 토큰까지의 시간(TTFT)과 전체 지연 표시
+SHOW_LATENCY = os.getenv("CLI_SHOW_LATENCY", "0") != "0"
+
+
+class MCPClient(AgentClient):
+    def __init__(self, transport_name=None):
+        # None이면 MCP_TRANSPORT (stdio/sse/http/memory, 기본 stdio)
+        super().__init__(transport_name=transport_name)
+        # 미리 떠 있는 warm 서버 주소 (예: http://127.0.0.1:8235/sse)
+        # 설정되면 클라이언트마다 서버를 새로 띄우지 않고 여기에 SSE로 연결
+        self.warm_url = os.getenv("CALC_WARM_URL")
+
+    async def _open(self):
+        t0 = time.perf_counter()
+        self.model = self._select_model()
+        import_seconds = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        await super()._open()
+        connect_seconds = time.perf_counter() - t0
+        print(
+            f"✅ MCP 세션이 시작되었습니다! "
+            f"(⏱️ 모듈 로딩 {import_seconds:.2f}s, 서버 연결 {connect_seconds:.2f}s"
+            f"{', warm 서버' if self.warm_url else ''})"
+        )
+
+    def _open_connection(self):
+        if self.warm_url:
+            from .mcp_session import sse_transport
+
+            self.transport = sse_transport(self.warm_url)
+        return super()._open_connection()
+
+    async def ask(self, message: str) -> str:
+        """에이전트에게 질문 (완성된 답변만 반환)"""
+        async for event in self.ask_stream(message):
+            if event["kind"] == "done":
+                return event["answer"]
+
+
+async def print_streaming(client: MCPClient, message: str):
+    """토큰은 도착하는 대로, 도구 호출은 한 줄씩 출력"""
+    print("🤔 처리 중...", end="\r")
+    at_line_start = True
+    async for event in client.ask_stream(message):
+        kind = event["kind"]
+        if kind == "token":
+            if at_line_start:
+                print(" " * 20, end="\r")
+                print("🤖 Bot: ", end="")
+                at_line_start = False
+            print(event["text"], end="", flush=True)
+        elif kind == "tool_start":
+            if not at_line_start:
+                print()
+            print(f"   🔧 {event['name']}({event['args']})")
+            at_line_start = True
+        elif kind == "done":
+            if at_line_start:
+                # 토큰이 하나도 오지 않은 경우 (스트리밍 미지원 모델 등)
+                print(" " * 20, end="\r")
+                print(f"🤖 Bot: {event['answer']}", end="")
+            print("\n")
+            if SHOW_LATENCY:
+                ttft = f"{event['ttft']:.2f}s" if event["ttft"] is not None else "-"
+                print(f"⏱️ TTFT {ttft}, 전체 {event['total']:.2f}s\n")
+
+
+class PromptReader:
+    """Reads stdin lines on a daemon thread so the event loop keeps running.
+
+    `asyncio.to_thread(input)`과 달리 daemon 스레드라서 종료할 때 입력을 기다리지 않고,
+    Ctrl+C로 중단된 input()은 다음 프롬프트에서 그대로 이어서 사용한다.
+    """
+
+    def __init__(self):
+        self._line: asyncio.Future | None = None
+        self._interrupt: asyncio.Future | None = None
+
+    @property
+    def waiting(self) -> bool:
+        return self._interrupt is not None and not self._interrupt.done()
+
+    async def read(self, prompt: str) -> str:
+        loop = asyncio.get_running_loop()
+        if self._line is None:
+            self._line = loop.create_future()
+            threading.Thread(
+                target=self._input, args=(loop, self._line, prompt), daemon=True
+            ).start()
+        else:
+            # 이전 input()이 아직 stdin을 읽는 중이면 프롬프트만 다시 표시
+            print(prompt, end="", flush=True)
+
+        self._interrupt = loop.create_future()
+        try:
+            await asyncio.wait({self._line, self._interrupt}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            self._interrupt.cancel()
+        if not self._line.done():
+            raise KeyboardInterrupt
+        line, self._line = self._line, None
+        return line.result()
+
+    def interrupt(self):
+        if self.waiting:
+            self._interrupt.set_result(None)
+
+    @staticmethod
+    def _input(loop, future: asyncio.Future, prompt: str):
+        try:
+            result, error = input(prompt), None
+        except BaseException as e:  # EOFError 등
+            result, error = None, e
+        loop.call_soon_threadsafe(PromptReader._settle, future, result, error)
+
+    @staticmethod
+    def _settle(future: asyncio.Future, result, error):
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+
+async def interactive_mode():
+    """대화형 CLI 모드"""
+    client = MCPClient()
+    reader = PromptReader()
+    loop = asyncio.get_running_loop()
+    previous_handler = signal.getsignal(signal.SIGINT)
+
+    def on_sigint(signum, frame):
+        # 입력 대기 중 Ctrl+C는 안내만 하고 계속, 처리 중이면 원래 처리(종료)로 넘김
+        if reader.waiting:
+            loop.call_soon_threadsafe(reader.interrupt)
+        elif callable(previous_handler):
+            previous_handler(signum, frame)
+
+    signal.signal(signal.SIGINT, on_sigint)
+
+    print("=" * 60)
+    print("🧮 Personal Calculator MCP Client")
+    print("=" * 60)
+    print()
+    print("명령어:")
+    print("  - 일반 질문: 자유롭게 입력하세요")
+    print("  - 'exit' 또는 'quit': 종료")
+    print("  - 'help': 도움말")
+    print()
+
+    # 연결은 백그라운드에서 진행하고 프롬프트는 바로 표시
+    start_task = asyncio.create_task(client.start())
+
+    try:
+        while True:
+            try:
+                user_input = (await reader.read("💬 You: ")).strip()
+
+                if not user_input:
+                    continue
+
+                if user_input.lower() in ["exit", "quit", "q"]:
+                    print("\n👋 계산기를 종료합니다...")
+                    break
+
+                if user_input.lower() == "help":
+                    print("\n📖 사용 가능한 기능:")
+                    print("  - 이름 설정: '내 이름은 철수야'")
+                    print("  - 계산: '5 + 3', '10 × 2', '20 - 5', '100 ÷ 4'")
+                    print("  - 기록: '기록 보여줘', '내 계산 기록'")
+                    print("  - 통계: '통계 보여줘'")
+                    print("  - 총합: '누적 합계는?', '총합은?'")
+                    print("  - 초기화: '계산기 초기화', '모두 초기화'")
+                    print()
+                    continue
+
+                if not start_task.done():
+                    print("🔌 서버 연결을 기다리는 중...", end="\r")
+                await start_task
+
+                if STREAM:
+                    await print_streaming(client, user_input)
+                else:
+                    print("🤔 처리 중...", end="\r")
+                    result = await client.ask(user_input)
+                    print(" " * 20, end="\r")  # 처리 중 메시지 지우기
+                    print(f"🤖 Bot: {result}\n")
+
+            except KeyboardInterrupt:
+                print("\n\n⚠️ Ctrl+C 감지. 종료하려면 'exit'를 입력하세요.\n")
+                continue
+            except EOFError:
+                # Ctrl+D 또는 입력 스트림 종료
+                print("\n👋 계산기를 종료합니다...")
+                break
+            except Exception as e:
+                print(f"\n❌ 오류: {e}\n")
+                continue
+
+    finally:
+        signal.signal(signal.SIGINT, previous_handler)
+        # 연결 중이었다면 취소하고, 취소 정리가 끝난 뒤 세션을 닫음
+        start_task.cancel()
+        await asyncio.gather(start_task, return_exceptions=True)
+        await client.stop()
+
+
+async def main():
+    """메인 함수"""
+    await interactive_mode()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\n\n👋 프로그램을 종료합니다.")
@@ -0,0 +1,514 @@
+import argparse
+import asyncio
+import json
+import time
+from contextlib import aclosing
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.errors import GraphRecursionError
+from langgraph.prebuilt import create_react_agent
+from .agent_client import AgentClient
+from .loop_guard import LoopGuard
+from .mcp_session import stdio_transport
+from .message_state import CompactCheckpointSerializer, compact_model_input
+from .model_router import select_model
+import os
+from dotenv import load_dotenv
+import uuid
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.tools import StructuredTool
+from .session_replay import (
+    ReplayChatModel,
+    SessionRecorder,
+    compare_tools,
+    latency_summary,
+    load_recording,
+    tool_output_text,
+)
+
+load_dotenv()
+
+# 상태를 바꾸지 않는 도구 → 모델이 호출하기 전에 미리 실행(prefetch)해도 안전
+READ_ONLY_TOOLS = {
+    "get_history",
+    "get_stats",
+    "get_total",
+    "get_user_name",
+    "query_stats",
+    "get_cache_stats",
+    "list_calculators",
+    "list_snapshots",
+    "compare_numbers",
+    "is_greater_than",
+    "is_less_than",
+}
+PREFETCH_HINTS = {
+    "get_history": ("기록", "history"),
+    "get_stats": ("통계", "stats"),
+    "get_total": ("총합", "합계", "total"),
+}
+
+
+class EarlyToolExecutor:
+    """스트리밍 중 인자가 완성된 tool call을 ToolNode보다 먼저 MCP 서버로 전송
+
+    조기 실행 결과는 (도구 이름, 인자) 키로 보관되고, 에이전트가 같은 호출을
+    실행하면 래핑된 도구가 새로 호출하는 대신 그 결과를 기다린다.
+    """
+
+    def __init__(self, tools):
+        self.originals = {tool.name: tool for tool in tools}
+        self._pending: dict[tuple[str, str], asyncio.Task] = {}
+        self._speculative: set[tuple[str, str]] = set()
+        self._last: asyncio.Task | None = None
+        self._buffers: dict[int, dict] = {}
+        # (name, args) → bool; False면 조기 실행하지 않음 (루프 감지 등)
+        self.allow = None
+        self.early = 0
+        self.hits = 0
+
+    @staticmethod
+    def _key(name: str, args: dict) -> tuple[str, str]:
+        return name, json.dumps(args, sort_keys=True, ensure_ascii=False)
+
+    def wrap_tools(self) -> list[StructuredTool]:
+        return [self._wrap(tool) for tool in self.originals.values()]
+
+    def _wrap(self, tool):
+        async def run(**kwargs):
+            key = self._key(tool.name, kwargs)
+            task = self._pending.pop(key, None)
+            self._speculative.discard(key)
+            if task is not None:
+                self.hits += 1
+                return await task
+            if tool.name not in READ_ONLY_TOOLS:
+                self._drop_speculative()
+            return await tool.coroutine(**kwargs)
+
+        return StructuredTool(
+            name=tool.name,
+            description=tool.description,
+            args_schema=tool.args_schema,
+            coroutine=run,
+            response_format=tool.response_format,
+        )
+
+    def _launch(self, name: str, args: dict, speculative=False) -> bool:
+        key = self._key(name, args)
+        if name not in self.originals or key in self._pending:
+            return False
+        if not speculative and self.allow is not None and not self.allow(name, args):
+            return False
+        if name not in READ_ONLY_TOOLS:
+            self._drop_speculative()
+
+        # 모델이 낸 순서대로 실행되도록 직전 조기 실행 작업 뒤에 연결
+        previous = self._last
+        tool = self.originals[name]
+
+        async def run():
+            if previous is not None and not speculative:
+                await asyncio.wait([previous])
+            return await tool.coroutine(**args)
+
+        task = asyncio.create_task(run())
+        self._pending[key] = task
+        if speculative:
+            self._speculative.add(key)
+        else:
+            self._last = task
+        return True
+
+    def _drop_speculative(self):
+        # 상태 변경 전에 미리 읽어둔 결과는 더 이상 유효하지 않음
+        # (모델이 낸 조기 실행 호출은 순서대로 연결되어 있으므로 그대로 둠)
+        for key in self._speculative:
+            self._pending.pop(key).cancel()
+        self._speculative.clear()
+
+    def prefetch(self, message: str) -> list[str]:
+        launched = []
+        for name, hints in PREFETCH_HINTS.items():
+            if any(hint in message for hint in hints):
+                if self._launch(name, {}, speculative=True):
+                    launched.append(name)
+        return launched
+
+    def on_model_start(self):
+        self._buffers = {}
+
+    def on_stream_chunk(self, chunk) -> list[tuple[str, dict]]:
+        """스트림 chunk를 누적하고 새로 완성되어 실행한 tool call 목록을 반환"""
+        launched = []
+        for tc in getattr(chunk, "tool_call_chunks", None) or []:
+            buf = self._buffers.setdefault(
+                tc.get("index") or 0, {"name": "", "args": "", "done": False}
+            )
+            buf["name"] += tc.get("name") or ""
+            buf["args"] += tc.get("args") or ""
+            if buf["done"] or not buf["args"].rstrip().endswith("}"):
+                continue
+            try:
+                args = json.loads(buf["args"])
+            except json.JSONDecodeError:
+                continue
+            if isinstance(args, dict):
+                buf["done"] = True
+                if self._launch(buf["name"], args):
+                    self.early += 1
+                    launched.append((buf["name"], args))
+        return launched
+
+    async def finish(self):
+        """질문 처리 후 남은 작업 정리 (추측 실행은 취소, 상태 변경 작업은 완료 대기)"""
+        for key, task in list(self._pending.items()):
+            if key in self._speculative:
+                task.cancel()
+            else:
+                await asyncio.wait([task])
+        self._pending.clear()
+        self._speculative.clear()
+        self._last = None
+
+
+class MCPClient(AgentClient):
+    def __init__(
+        self,
+        model=None,
+        recorder: SessionRecorder | None = None,
+        transport=None,
+        memory: bool | None = None,
+    ):
+        super().__init__(model=model, transport=transport)
+        self.recorder = recorder
+        self.thread_id = None
+        self.executor = None
+        # 기본은 질문마다 새 상태로 실행 (REACT_MEMORY=1이면 이전 질문을 이어서 기억)
+        if memory is None:
+            memory = os.getenv("REACT_MEMORY", "0") != "0"
+        self.checkpointer = InMemorySaver(serde=CompactCheckpointSerializer()) if memory else None
+
+    async def start(self, reset_server=True):
+        """MCP 세션 시작"""
+        if self.is_running:
+            print("⚠️ 이미 실행 중입니다!")
+            return
+
+        await super().start()
+
+        # 서버 초기화
+        if reset_server:
+            await self._reset_server()
+
+    async def _open(self):
+        print("🔌 서버에 연결 중...")
+        await super()._open()
+
+        # Thread ID 생성
+        self.thread_id = str(uuid.uuid4())
+        print(f"✅ MCP 세션 시작! (Thread: {self.thread_id[:8]}...)\n")
+
+    def _select_model(self):
+        return select_model(
+            os.getenv("MODEL_NAME", "gpt-4"),
+            temperature=0.7,
+            streaming=True,
+            openai_kwargs={"model_kwargs": {"parallel_tool_calls": False}},  # 순차 실행
+        )
+
+    def _create_agent(self, tools):
+        print(f"🔧 {len(tools)}개 도구 로드됨")
+
+        # Agent 생성 (스트림에서 완성된 tool call을 미리 실행하도록 도구 래핑)
+        self.executor = EarlyToolExecutor(tools)
+        # 모델에는 오래된 도구 결과/반복 지시문을 줄인 메시지만 보내고,
+        # memory를 켠 경우 대화 상태는 thread_id별 compact 바이너리 체크포인트에 저장
+        return create_react_agent(
+            self.model,
+            self.executor.wrap_tools(),
+            pre_model_hook=compact_model_input,
+            checkpointer=self.checkpointer,
+        )
+
+    def _config(self, **extra) -> dict:
+        config = {"configurable": {"thread_id": self.thread_id}, **extra}
+        if self.recorder:
+            config["callbacks"] = [self.recorder]
+        return config
+
+    async def _reset_server(self):
+        """서버 데이터 초기화"""
+        print("🔄 서버 데이터 초기화 중...")
+        try:
+            config = self._config()
+            response = await self.agent.ainvoke(
+                {"messages": [("user", "clear_all_data를 실행해주세요")]}, config=config
+            )
+            result = response["messages"][-1].content
+            print(result)
+        except Exception as e:
+            print(f"⚠️ 초기화 실패: {e}")
+        print()
+
+    async def ask_with_streaming(self, message: str) -> str:
+        """✨✨ 실시간 스트리밍 + Tool 강제 사용"""
+        if not self.is_running:
+            return "❌ 먼저 start()를 실행하세요!"
+
+        await self._ensure_connected()
+
+        print(f"\n{'=' * 70}")
+        print(f"💬 질문: {message}")
+        print(f"{'=' * 70}\n")
+
+        # ✅ Tool 사용 강제 프롬프트
+        enhanced_message = f"""CRITICAL RULES:
+1. You MUST use the available tools for ALL calculations
+2. Do NOT calculate anything in your head
+3. Do NOT write numbers as results without calling tools
+4. Before each tool call, explain your reasoning
+5. After each tool result, explain what you learned
+
+Available calculation tools:
+- add(a, b): addition
+- subtract(a, b): subtraction  
+- multiply(a, b): multiplication
+- divide(a, b): division
+- percentage(value, percent): calculate percentage (value/percent may be lists)
+- increase_by_percent(value, percent): increase by %
+- decrease_by_percent(value, percent): decrease by %
+- calculate_average(numbers): average of list
+- calculate_sum(numbers): sum of list
+- find_max(numbers): maximum value
+- find_min(numbers): minimum value
+- compare_numbers(a, b): compare two numbers
+- is_greater_than(value, threshold): check if greater
+- is_less_than(value, threshold): check if less
+(percent/compare tools accept a number or a list for each argument and evaluate element-wise in one call)
+
+Task: {message}
+
+Remember: USE TOOLS FOR EVERY CALCULATION! Explain your reasoning before each tool call."""
+
+        # 질문 크기에 맞춘 도구 호출 예산과 recursion_limit, 반복 호출 감지
+        guard = LoopGuard.for_request(message, READ_ONLY_TOOLS)
+        self.executor.allow = guard.allows
+        config = self._config(recursion_limit=guard.recursion_limit)
+        if self.recorder:
+            self.recorder.mark_question(message)
+
+        thinking_num = 0
+        action_num = 0
+        current_thinking = ""
+        # 조기 종료 시 돌려줄 가장 최근의 도구 결과 또는 (도구 호출 없는) 모델 답변
+        best_answer = ""
+
+        print("🌊 Streaming started...\n")
+
+        prefetched = self.executor.prefetch(message)
+        if prefetched:
+            print(f"🔮 Prefetch: {', '.join(prefetched)}\n")
+        hits_before = self.executor.hits
+
+        events = self.agent.astream_events(
+            {"messages": [("user", enhanced_message)]}, config=config, version="v2"
+        )
+        try:
+            # break로 빠져나와도 그래프 실행을 바로 정리 (다음 모델 호출/도구 실행 안 함)
+            async with aclosing(events):
+                async for event in events:
+                    kind = event["event"]
+
+                    # 🧠 LLM 시작
+                    if kind == "on_chat_model_start":
+                        self.executor.on_model_start()
+                        thinking_num += 1
+                        current_thinking = ""
+                        print(f"{'─' * 70}")
+                        print(f"💭 Thought #{thinking_num}:")
+                        print("   ", end="", flush=True)
+
+                    # 🌊 LLM 스트리밍
+                    elif kind == "on_chat_model_stream":
+                        chunk = event["data"]["chunk"]
+
+                        if hasattr(chunk, "content") and chunk.content:
+                            print(chunk.content, end="", flush=True)
+                            current_thinking += chunk.content
+
+                        for name, _ in self.executor.on_stream_chunk(chunk):
+                            print(f"\n   ⚡ {name} 조기 실행", end="", flush=True)
+
+                    # ✅ LLM 종료
+                    elif kind == "on_chat_model_end":
+                        print()  # 개행
+
+                        output = event["data"].get("output")
+                        tool_calls = getattr(output, "tool_calls", None) if output else None
+
+                        if not current_thinking.strip():
+                            print("   (No reasoning - function calling mode)")
+                        elif not tool_calls:
+                            # 도구 호출 전 추론 텍스트는 답이 아니므로 마지막 도구 결과를 유지
+                            best_answer = current_thinking.strip()
+
+                        if tool_calls:
+                            print()
+                            for tc in tool_calls:
+                                # 도구가 실행되기 전에 예산/반복 확인
+                                if guard.record(tc["name"], tc["args"]):
+                                    break
+                                action_num += 1
+                                print(f"🔧 Action #{action_num}: {tc['name']}")
+                                args_str = ", ".join([
+                                    f"{k}={v}" for k, v in tc["args"].items()
+                                ])
+                                print(f"   Args: {args_str}")
+                            if guard.reason:
+                                break
+
+                    # ✅ Tool 종료
+                    elif kind == "on_tool_end":
+                        tool_output = tool_output_text(event["data"].get("output"))
+                        best_answer = tool_output
+
+                        print(f"\n📊 Observation:")
+                        print(f"   {tool_output}\n")
+        except GraphRecursionError:
+            guard.reason = f"recursion_limit {guard.recursion_limit} 도달"
+
+        if guard.reason:
+            print(f"\n⛔ 조기 종료: {guard.reason} (도구 {guard.calls}/{guard.budget}회)")
+            print(f"🤖 지금까지의 결과: {best_answer or '(답변 없음)'}\n")
+
+        await self.executor.finish()
+        self.executor.allow = None
+
+        print(f"{'=' * 70}")
+        print(
+            f"✅ 완료! (Thoughts: {thinking_num}, Actions: {action_num}, "
+            f"Early hits: {self.executor.hits - hits_before})"
+        )
+
+        if action_num == 0:
+            print(f"\n⚠️  경고: Tool이 하나도 사용되지 않았습니다!")
+            print(f"💡  LLM이 직접 계산했을 가능성이 높습니다.")
+
+        print(f"{'=' * 70}\n")
+
+
+async def main(client: MCPClient | None = None):
+    """복잡한 계산으로 Tool 사용 강제"""
+    client = client or MCPClient()
+
+    async with client:
+        # 테스트 1: 다단계 계산
+        print("\n" + "🟢" * 35)
+        print("🧠 테스트 1: 다단계 계산 (Tool 강제)")
+        print("🟢" * 35)
+        await client.ask_with_streaming(
+            "다음을 순서대로 계산해줘:\n"
+            "1. 123 + 456\n"
+            "2. 결과 - 78\n"
+            "3. 결과 ÷ 12\n"
+            "4. 결과 × 25"
+        )
+
+        # 테스트 2: 백분율 계산
+        print("\n" + "🔵" * 35)
+        print("📊 테스트 2: 백분율 계산")
+        print("🔵" * 35)
+        await client.ask_with_streaming(
+            "150을 23% 증가시킨 다음, 그 결과에서 18을 빼줘"
+        )
+
+        # 테스트 3: 여러 값 비교
+        print("\n" + "🟡" * 35)
+        print("⚖️ 테스트 3: 여러 값 비교")
+        print("🟡" * 35)
+        await client.ask_with_streaming(
+            "88 × 12, 1500 ÷ 3, 100 × 10을 각각 계산하고,\n"
+            "그 중 최댓값, 최솟값, 평균을 구해줘"
+        )
+
+        # 테스트 4: 기록 분석
+        print("\n" + "🟣" * 35)
+        print("📈 테스트 4: 기록 분석")
+        print("🟣" * 35)
+        await client.ask_with_streaming(
+            "내 계산 기록을 보여주고, 통계를 분석하고, 총합을 계산해줘.\n"
+            "총합이 5000보다 크면 '상위권', 3000~5000이면 '중위권', 아니면 '하위권'으로 분류해줘"
+        )
+
+
+async def simple_test():
+    """간단한 테스트 - Tool 사용 확인"""
+    client = MCPClient()
+
+    async with client:
+        print("\n" + "🔵" * 35)
+        print("🧪 간단한 테스트: Tool 사용 확인")
+        print("🔵" * 35)
+        await client.ask_with_streaming("10 + 20을 계산해줘")
+
+        print("\n" + "🟢" * 35)
+        print("🧪 기록 확인")
+        print("🟢" * 35)
+        await client.ask_with_streaming("내 계산 기록을 보여줘")
+
+
+async def record(path: str):
+    """실제 모델로 시나리오를 실행하면서 모델 응답과 도구 결과를 녹화"""
+    recorder = SessionRecorder()
+    started = time.perf_counter()
+    # 녹화/재생 모두 새 서버 프로세스에서 시작 (이미 떠 있는 서버의 이름·계산기·스냅샷·
+    # 캐시 통계가 결과에 섞이면 재생 비교가 회귀가 아닌 차이를 보고함)
+    await main(MCPClient(recorder=recorder, transport=stdio_transport()))
+    recorder.save(path, model_name=os.getenv("MODEL_NAME", ""))
+    print(f"💾 녹화 저장: {path} ({time.perf_counter() - started:.2f}s)")
+    print(f"   {latency_summary(recorder.events)}")
+
+
+async def replay(path: str) -> bool:
+    """녹화된 모델 응답으로 새 서버에 시나리오를 재실행하고 결과/지연을 비교"""
+    recorded = load_recording(path)
+    model = ReplayChatModel(responses=[e for e in recorded if e["kind"] == "model"])
+    recorder = SessionRecorder()
+
+    started = time.perf_counter()
+    await main(MCPClient(model=model, recorder=recorder, transport=stdio_transport()))
+    elapsed = time.perf_counter() - started
+
+    diffs = compare_tools(
+        [e for e in recorded if e["kind"] == "tool"], recorder.tools
+    )
+    print(f"{'=' * 70}")
+    print(f"⏪ 재생 완료: {elapsed:.2f}s")
+    print(f"   녹화: {latency_summary(recorded)}")
+    print(f"   재생: {latency_summary(recorder.events)}")
+    if diffs:
+        print(f"❌ 도구 결과 불일치 {len(diffs)}건:")
+        for diff in diffs:
+            print(f"   {diff}")
+    else:
+        print("✅ 모든 도구 결과가 녹화와 일치합니다.")
+    return not diffs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--record", metavar="PATH", help="세션을 녹화 (예: session.jsonl.gz)")
+    group.add_argument("--replay", metavar="PATH", help="녹화된 세션을 모델 없이 재생")
+    args = parser.parse_args()
+
+    if args.record:
+        asyncio.run(record(args.record))
+    elif args.replay:
+        raise SystemExit(0 if asyncio.run(replay(args.replay)) else 1)
+    else:
+        # 간단한 테스트 먼저
+        # asyncio.run(simple_test())
+
+        # 또는 전체 테스트
+        asyncio.run(main())
@@ -0,0 +1,85 @@
+# embedded.py
+"""In-process embedded mode: call the calculator tools without MCP or IPC.
+
+배치 작업이나 로컬 에이전트에서는 `add` 한 번마다 JSON-RPC 직렬화와 subprocess(stdio)
+또는 HTTP 왕복 비용을 낼 이유가 없다. `MCP_TRANSPORT=embedded`면 같은 프로세스에 로드한
+FastMCP 서버의 도구 함수를 LangChain 도구로 바로 감싸서 호출한다 (밀리초 → 마이크로초).
+MCP 프로토콜 동작(미들웨어, 리소스 구독 등)까지 필요하면 `MCP_TRANSPORT=memory`를 쓴다.
+
+    conn = EmbeddedConnection()
+    await conn.call("add", a=5, b=3)  # "5.0 + 3.0 = 8.0"
+"""
+from typing import Any
+
+from fastmcp.exceptions import ToolError
+from langchain_core.tools import StructuredTool, ToolException
+from pydantic import ValidationError
+
+
+async def _invoke(tool, kwargs: dict) -> str:
+    # MCP transport와 같은 pydantic 검증/변환을 거침 (예: "5" → 5.0, 빠진 인자는 오류)
+    try:
+        result = await tool.run(kwargs)
+    except ValidationError as e:
+        raise ToolError(f"Error calling tool {tool.name!r}: {e}") from None
+    return "\n".join(block.text for block in result.content if hasattr(block, "text"))
+
+
+def _wrap(tool) -> StructuredTool:
+    async def run(**kwargs):
+        try:
+            result = await _invoke(tool, kwargs)
+        except ToolError as e:
+            # load_mcp_tools가 isError 결과를 다루는 방식과 같게
+            raise ToolException(str(e)) from None
+        # MCP 도구(load_mcp_tools)와 같은 (content, artifact) 형식
+        return result, None
+
+    return StructuredTool(
+        name=tool.name,
+        description=tool.description or "",
+        args_schema=tool.parameters,
+        coroutine=run,
+        response_format="content_and_artifact",
+    )
+
+
+class EmbeddedConnection:
+    """MCPConnection과 같은 인터페이스로 서버 도구 함수를 직접 호출"""
+
+    def __init__(self, server=None):
+        self.server = server
+        self._tools: dict[str, Any] = {}
+
+    @property
+    def alive(self) -> bool:
+        # 같은 프로세스이므로 끊어질 연결이 없음
+        return True
+
+    async def connect(self):
+        if self.server is None:
+            from calculator_mcp.server import mcp
+
+            self.server = mcp
+        if not self._tools:
+            self._tools = await self.server.get_tools()
+        return self
+
+    async def load_tools(self) -> list[StructuredTool]:
+        await self.connect()
+        return [_wrap(tool) for tool in self._tools.values()]
+
+    async def call(self, tool: str, /, **kwargs) -> str:
+        """도구 하나를 직접 호출 (에이전트 없이 배치 작업에서 사용)
+
+        도구 이름은 위치 전용 인자라서 `name` 인자를 받는 도구도 그대로 호출할 수 있음
+        (예: `call("set_user_name", name="민수")`).
+        """
+        await self.connect()
+        return await _invoke(self._tools[tool], kwargs)
+
+    async def reconnect(self):
+        return await self.connect()
+
+    async def aclose(self):
+        pass
@@ -0,0 +1,83 @@
+# loop_guard.py
+"""Per-request tool-call budget and loop detection for the ReAct agent.
+
+모델이 같은 도구를 같은 인자로 계속 부르거나(예: get_total 반복), 서로를 되돌리는 두 호출을
+번갈아 부르면(undo ↔ redo) 고정된 `recursion_limit`에 닿을 때까지 모델 시간과 서버 용량을
+쓴다. 질문 크기에 맞춘 도구 호출 예산을 정하고, 반복이 감지되면 도구를 실행하기 전에
+멈춰서 지금까지의 결과로 답하게 한다.
+"""
+import json
+import os
+import re
+from collections import Counter
+from typing import Optional
+
+BUDGET_BASE = int(os.getenv("REACT_TOOL_BUDGET_BASE", "4"))
+BUDGET_MAX = int(os.getenv("REACT_TOOL_BUDGET_MAX", "30"))
+MAX_REPEATS = int(os.getenv("REACT_MAX_REPEATS", "2"))
+
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+
+
+def adaptive_budget(message: str) -> int:
+    """질문에 나온 숫자 하나당 도구 호출 1회를 더 허용 (BASE ~ MAX)"""
+    return min(BUDGET_BASE + len(_NUMBER.findall(message)), BUDGET_MAX)
+
+
+class LoopGuard:
+    def __init__(self, budget: int, read_only: set[str], max_repeats: int = MAX_REPEATS):
+        self.budget = budget
+        self.read_only = read_only
+        self.max_repeats = max_repeats
+        self.calls = 0
+        self.reason: Optional[str] = None
+        self._counts: Counter[tuple] = Counter()
+        self._trail: list[tuple] = []
+        # 상태를 바꾸는 호출 수; 읽기 도구는 그 사이에 상태가 바뀌었으면 반복으로 보지 않음
+        self._epoch = 0
+
+    @classmethod
+    def for_request(cls, message: str, read_only: set[str]) -> "LoopGuard":
+        return cls(adaptive_budget(message), read_only)
+
+    @property
+    def recursion_limit(self) -> int:
+        # 도구 1회 = pre_model_hook + agent + tools 3단계, 마지막 답변 2단계
+        return 3 * (self.budget + 1) + 1
+
+    def _key(self, name: str, args: dict) -> tuple:
+        args_key = json.dumps(args, sort_keys=True, ensure_ascii=False)
+        if name in self.read_only:
+            return name, args_key, self._epoch
+        return name, args_key
+
+    def check(self, name: str, args: dict) -> Optional[str]:
+        """이 호출을 실행하면 멈춰야 하는 이유 (괜찮으면 None), 기록은 하지 않음"""
+        if self.calls >= self.budget:
+            return f"도구 호출 예산 {self.budget}회 초과"
+        key = self._key(name, args)
+        if self._counts[key] >= self.max_repeats:
+            return f"같은 호출 반복: {name}({key[1]})"
+        if len(self._trail) >= 3:
+            # A, B, A 다음에 다시 B → 두 호출이 서로를 되돌리며 제자리걸음
+            a, b, c = self._trail[-3:]
+            if a == c and b == key and a != b:
+                return f"진전 없는 반복: {a[0]} ↔ {b[0]}"
+        return None
+
+    def allows(self, name: str, args: dict) -> bool:
+        return self.check(name, args) is None
+
+    def record(self, name: str, args: dict) -> Optional[str]:
+        """호출을 기록하고, 멈춰야 하면 그 이유를 반환"""
+        reason = self.check(name, args)
+        if reason:
+            self.reason = reason
+            return reason
+        key = self._key(name, args)
+        self._counts[key] += 1
+        self._trail.append(key)
+        self.calls += 1
+        if name not in self.read_only:
+            self._epoch += 1
+        return None
@@ -0,0 +1,215 @@
+# mcp_session.py
+"""MCP transport + ClientSession lifecycle shared by the clients.
+
+stdio/SSE 클라이언트는 anyio task group을 쓰기 때문에 진입한 태스크에서 빠져나와야 한다.
+그래서 연결 전체를 전용 owner 태스크 안의 `AsyncExitStack`으로 열고 닫는다.
+start/stop이 서로 다른 태스크에서 불려도 안전하고, 취소되어도 transport와
+서버 프로세스가 새지 않는다. 주기적인 ping으로 죽은 서버를 감지하면 스택을 닫아
+stdio 서버 프로세스를 바로 정리하고, 다음 요청에서 backoff와 함께 다시 연결한다.
+
+transport는 `(read, write)` 스트림 쌍을 여는 async context manager 팩토리이며
+stdio / SSE / streamable HTTP / memory(같은 프로세스의 FastMCP 서버, IPC 없음)
+중에서 `MCP_TRANSPORT`로 고른다. `embedded`는 MCP 세션 없이 도구 함수를 직접
+호출한다 (`embedded.py`).
+"""
+import asyncio
+import logging
+import os
+import sys
+from contextlib import AsyncExitStack, asynccontextmanager
+from pathlib import Path
+from typing import AsyncContextManager, Callable, Optional
+
+import anyio
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.sse import sse_client
+from mcp.client.stdio import stdio_client
+from mcp.client.streamable_http import streamablehttp_client
+from mcp.shared.memory import create_client_server_memory_streams
+
+logger = logging.getLogger(__name__)
+
+STARTUP_TIMEOUT = float(os.getenv("MCP_STARTUP_TIMEOUT", "20"))
+SHUTDOWN_TIMEOUT = float(os.getenv("MCP_SHUTDOWN_TIMEOUT", "5"))
+PING_INTERVAL = float(os.getenv("MCP_PING_INTERVAL", "15"))
+PING_TIMEOUT = float(os.getenv("MCP_PING_TIMEOUT", "5"))
+CONNECT_RETRIES = int(os.getenv("MCP_CONNECT_RETRIES", "3"))
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+TRANSPORTS = ("stdio", "sse", "http", "memory", "embedded")
+DEFAULT_URLS = {"sse": "http://localhost:8234/sse", "http": "http://localhost:8234/mcp"}
+
+
+def stdio_transport(module: str = "calculator_mcp.server") -> Callable[[], AsyncContextManager]:
+    params = StdioServerParameters(
+        command=sys.executable,
+        args=["-m", module, "--transport", "stdio"],
+        cwd=str(PROJECT_ROOT),
+    )
+    return lambda: stdio_client(params)
+
+
+def sse_transport(url: str = DEFAULT_URLS["sse"]) -> Callable[[], AsyncContextManager]:
+    return lambda: sse_client(url=url)
+
+
+def http_transport(url: str = DEFAULT_URLS["http"]) -> Callable[[], AsyncContextManager]:
+    @asynccontextmanager
+    async def open_streams():
+        # streamable HTTP는 (read, write, get_session_id)를 주므로 스트림 쌍만 넘김
+        async with streamablehttp_client(url) as (read, write, _):
+            yield read, write
+
+    return open_streams
+
+
+def memory_transport(server=None) -> Callable[[], AsyncContextManager]:
+    """같은 프로세스의 FastMCP 서버에 메모리 스트림으로 연결 (subprocess/HTTP 없음)"""
+
+    @asynccontextmanager
+    async def open_streams():
+        nonlocal server
+        if server is None:
+            from calculator_mcp.server import mcp as server
+        lowlevel = server._mcp_server
+        async with create_client_server_memory_streams() as (client_streams, server_streams):
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(
+                    lambda: lowlevel.run(
+                        *server_streams, lowlevel.create_initialization_options()
+                    )
+                )
+                try:
+                    yield client_streams
+                finally:
+                    tg.cancel_scope.cancel()
+
+    return open_streams
+
+
+def select_transport(
+    name: Optional[str] = None, url: Optional[str] = None
+) -> Callable[[], AsyncContextManager]:
+    """`MCP_TRANSPORT`(stdio/sse/http/memory)와 `MCP_SERVER_URL`로 transport 선택"""
+    name = name or os.getenv("MCP_TRANSPORT", "stdio")
+    url = url or os.getenv("MCP_SERVER_URL")
+    if name == "stdio":
+        return stdio_transport()
+    if name == "sse":
+        return sse_transport(url or DEFAULT_URLS["sse"])
+    if name == "http":
+        return http_transport(url or DEFAULT_URLS["http"])
+    if name == "memory":
+        return memory_transport()
+    if name == "embedded":
+        raise ValueError("embedded는 transport가 아니라 직접 호출입니다. open_connection()을 사용하세요.")
+    raise ValueError(f"알 수 없는 MCP_TRANSPORT: {name!r} ({', '.join(TRANSPORTS)} 중 하나)")
+
+
+def open_connection(name: Optional[str] = None, url: Optional[str] = None):
+    """MCPConnection, 또는 `embedded`면 도구 함수를 직접 부르는 EmbeddedConnection"""
+    name = name or os.getenv("MCP_TRANSPORT", "stdio")
+    if name == "embedded":
+        from calculator_mcp.embedded import EmbeddedConnection
+
+        return EmbeddedConnection()
+    return MCPConnection(select_transport(name, url))
+
+
+class MCPConnection:
+    def __init__(
+        self,
+        open_transport: Callable[[], AsyncContextManager],
+        startup_timeout: float = STARTUP_TIMEOUT,
+        retries: int = CONNECT_RETRIES,
+        backoff: float = 0.5,
+    ):
+        self.open_transport = open_transport
+        self.startup_timeout = startup_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.session: Optional[ClientSession] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = asyncio.Event()
+
+    @property
+    def alive(self) -> bool:
+        return self.session is not None and self._task is not None and not self._task.done()
+
+    async def connect(self) -> ClientSession:
+        """연결하고 세션을 반환 (실패하면 지수 backoff로 재시도)"""
+        delay = self.backoff
+        for attempt in range(1, self.retries + 1):
+            try:
+                return await self._connect_once()
+            except Exception as e:
+                if attempt == self.retries:
+                    raise ConnectionError(f"MCP 서버 연결 실패 ({attempt}회 시도): {e}") from e
+                logger.warning(f"MCP connect attempt {attempt} failed: {e!r}; retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                delay *= 2
+
+    async def load_tools(self) -> list:
+        """(재)연결하고 서버 도구를 LangChain 도구로 변환"""
+        from langchain_mcp_adapters.tools import load_mcp_tools
+
+        return await load_mcp_tools(await self.connect())
+
+    async def reconnect(self) -> ClientSession:
+        await self.aclose()
+        return await self.connect()
+
+    async def _connect_once(self) -> ClientSession:
+        await self.aclose()
+        self._closing = asyncio.Event()
+        ready = asyncio.get_running_loop().create_future()
+        self._task = asyncio.create_task(self._run(ready))
+        try:
+            return await asyncio.wait_for(asyncio.shield(ready), self.startup_timeout)
+        except BaseException:
+            # 시간 초과/취소/초기화 실패 시 transport와 서버 프로세스를 반드시 정리
+            await self.aclose()
+            raise
+
+    async def _run(self, ready: asyncio.Future):
+        try:
+            async with AsyncExitStack() as stack:
+                read, write = await stack.enter_async_context(self.open_transport())
+                session = await stack.enter_async_context(ClientSession(read, write))
+                await session.initialize()
+                self.session = session
+                ready.set_result(session)
+                await self._watch(session)
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                logger.warning(f"MCP connection closed: {e!r}")
+        finally:
+            self.session = None
+            if not ready.done():
+                ready.set_exception(ConnectionError("MCP 연결이 초기화 중에 취소되었습니다"))
+
+    async def _watch(self, session: ClientSession):
+        # stop 신호가 오거나 ping이 실패할 때까지 대기
+        while not self._closing.is_set():
+            try:
+                await asyncio.wait_for(self._closing.wait(), PING_INTERVAL)
+            except asyncio.TimeoutError:
+                try:
+                    await asyncio.wait_for(session.send_ping(), PING_TIMEOUT)
+                except Exception as e:
+                    logger.warning(f"MCP server not responding ({e!r}); closing connection")
+                    return
+
+    async def aclose(self):
+        """취소되어도 owner 태스크가 끝날 때까지 정리 (최대 SHUTDOWN_TIMEOUT 후 강제 취소)"""
+        task, self._task = self._task, None
+        if task is None or task.done():
+            return
+        self._closing.set()
+        try:
+            await asyncio.shield(asyncio.wait_for(asyncio.wait([task]), SHUTDOWN_TIMEOUT))
+        except asyncio.TimeoutError:
+            task.cancel()
+            await asyncio.wait([task])
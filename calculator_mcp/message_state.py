@@ -0,0 +1,161 @@
+# message_state.py
+"""Compact agent message history for ReAct steps and checkpoints.
+
+ReAct 루프는 단계마다 `messages` 전체를 모델에 다시 보내고, 체크포인트에도 전체 메시지
+객체를 그대로 저장한다. 여기서는
+- 모델 입력: 오래된 도구 결과(최근 `AGENT_TOOL_OUTPUT_WINDOW`개 이전)를 짧은 표시로 바꾸고,
+  매 질문마다 반복되는 지시문(prefix)은 마지막 질문에만 남긴다 (`compact_messages`).
+- 체크포인트: 내용/도구 호출(잘못된 도구 호출 포함)/도구 artifact만 남긴 튜플 +
+  문자열 테이블을 pickle/zlib으로 묶은 바이너리로 저장한다
+  (`pack_messages`, `CompactCheckpointSerializer`).
+  응답 메타데이터(token usage, logprobs 등)와 additional_kwargs는 저장하지 않는다.
+"""
+import os
+import pickle
+import zlib
+from os.path import commonprefix
+
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    SystemMessage,
+    ToolMessage,
+)
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+TOOL_OUTPUT_WINDOW = int(os.getenv("AGENT_TOOL_OUTPUT_WINDOW", "6"))
+
+# 이보다 짧게 겹치는 prefix는 우연의 일치로 보고 그대로 둠
+MIN_SHARED_PREFIX = 200
+
+PACK_VERSION = 2
+
+
+def _text(content) -> str:
+    if isinstance(content, str):
+        return content
+    return "".join(
+        part if isinstance(part, str) else part.get("text", "") for part in content
+    )
+
+
+def compact_messages(messages: list[BaseMessage], window: int = TOOL_OUTPUT_WINDOW) -> list[BaseMessage]:
+    """오래된 도구 결과와 반복된 지시문을 줄인 사본 (원본 메시지는 건드리지 않음)"""
+    tool_positions = [i for i, m in enumerate(messages) if isinstance(m, ToolMessage)]
+    stale = set(tool_positions[: max(len(tool_positions) - window, 0)])
+    latest = next(
+        (m for m in reversed(messages) if isinstance(m, HumanMessage) and isinstance(m.content, str)),
+        None,
+    )
+
+    compacted = []
+    for i, message in enumerate(messages):
+        if i in stale:
+            # tool_call_id는 유지해야 AIMessage의 tool call과 짝이 맞음
+            text = _text(message.content)
+            message = message.model_copy(
+                update={"content": f"[이전 도구 결과 생략: {message.name}, {len(text)}자]"}
+            )
+        elif (
+            isinstance(message, (HumanMessage, SystemMessage))
+            and latest is not None
+            and message is not latest
+            and isinstance(message.content, str)
+        ):
+            shared = len(commonprefix([message.content, latest.content]))
+            if shared >= MIN_SHARED_PREFIX:
+                message = message.model_copy(
+                    update={"content": f"[마지막 질문과 같은 지시 생략]\n{message.content[shared:]}"}
+                )
+        compacted.append(message)
+    return compacted
+
+
+def compact_model_input(state) -> dict:
+    """create_react_agent의 pre_model_hook: 상태는 그대로 두고 모델 입력만 줄임"""
+    return {"llm_input_messages": compact_messages(state["messages"])}
+
+
+_KINDS = {"human": HumanMessage, "ai": AIMessage, "tool": ToolMessage, "system": SystemMessage}
+
+
+def _packable(obj) -> bool:
+    return (
+        isinstance(obj, list)
+        and bool(obj)
+        and all(isinstance(m, (HumanMessage, AIMessage, ToolMessage, SystemMessage)) for m in obj)
+    )
+
+
+def pack_messages(messages: list[BaseMessage]) -> bytes:
+    """메시지 목록 → 압축 바이너리 (같은 문자열은 테이블에 한 번만 저장)"""
+    strings: dict[str, int] = {}
+
+    def ref(value):
+        return strings.setdefault(value, len(strings)) if isinstance(value, str) else value
+
+    rows = []
+    for m in messages:
+        kind = "ai" if isinstance(m, AIMessage) else m.type
+        tool_calls = [
+            (ref(tc["name"]), tc["args"], tc["id"]) for tc in getattr(m, "tool_calls", None) or []
+        ]
+        rows.append(
+            (
+                kind,
+                ref(m.content),
+                m.id,
+                ref(m.name),
+                tool_calls,
+                getattr(m, "tool_call_id", None),
+                getattr(m, "status", None),
+                getattr(m, "invalid_tool_calls", None) or [],
+                getattr(m, "artifact", None),
+            )
+        )
+    payload = (PACK_VERSION, list(strings), rows)
+    return zlib.compress(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL), 1)
+
+
+def unpack_messages(data: bytes) -> list[BaseMessage]:
+    version, strings, rows = pickle.loads(zlib.decompress(data))
+    if version != PACK_VERSION:
+        raise ValueError(f"Unsupported message pack version: {version}")
+
+    def deref(value):
+        return strings[value] if isinstance(value, int) else value
+
+    messages = []
+    for kind, content, id_, name, tool_calls, tool_call_id, status, invalid, artifact in rows:
+        fields = {"content": deref(content), "id": id_, "name": deref(name)}
+        if kind == "ai":
+            fields["tool_calls"] = [
+                {"name": deref(n), "args": args, "id": call_id, "type": "tool_call"}
+                for n, args, call_id in tool_calls
+            ]
+            fields["invalid_tool_calls"] = invalid
+        elif kind == "tool":
+            fields["tool_call_id"] = tool_call_id
+            fields["status"] = status or "success"
+            fields["artifact"] = artifact
+        messages.append(_KINDS[kind](**fields))
+    return messages
+
+
+class CompactCheckpointSerializer(JsonPlusSerializer):
+    """메시지 목록 채널은 compact 바이너리로, 나머지는 기본 직렬화로 저장"""
+
+    TYPE = "compact-messages"
+
+    def dumps_typed(self, obj):
+        if _packable(obj):
+            # 다음 질문부터는 오래된 도구 결과가 상태에서도 빠짐
+            return self.TYPE, pack_messages(compact_messages(obj))
+        return super().dumps_typed(obj)
+
+    def loads_typed(self, data):
+        kind, payload = data
+        if kind == self.TYPE:
+            return unpack_messages(payload)
+        return super().loads_typed(data)
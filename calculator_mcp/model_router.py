@@ -0,0 +1,288 @@
+# model_router.py
+"""Model selection and routing across several OpenAI-compatible backends.
+
+`MODEL_BACKENDS`에 여러 모델을 쉼표로 지정하면 (예: ``Qwen/Qwen3-32B@http://gpu1:8000/v1,gpt-4o-mini``)
+백엔드별 최근 지연/오류율을 추적해서 가장 빠른 정상 백엔드로 요청을 보내고,
+실패하면 다음 백엔드로 넘어간다. 응답이 p95보다 늦어지면 두 번째 백엔드에 같은
+요청을 동시에 보내고(hedging) 먼저 끝난 쪽을 사용한다.
+지정하지 않으면 기존처럼 `MODEL_NAME` 하나로 `ChatOpenAI`를 만든다.
+
+모든 모델은 프로세스 전역에서 공유하는 httpx 클라이언트를 사용하므로
+`MCPClient`를 여러 개 만들어도 커넥션 풀과 TLS 핸드셰이크는 한 번만 생긴다.
+"""
+import asyncio
+import importlib.util
+import os
+import time
+from collections import deque
+from statistics import quantiles
+from typing import Any, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import ConfigDict
+
+_http_clients: Optional[tuple[Any, Any]] = None
+
+# 백엔드 호출은 상위 실행의 콜백을 물려받지 않음 (라우터의 run_manager만 보고하므로
+# 그러지 않으면 start/end 이벤트와 스트리밍 토큰이 두 번씩 나감)
+_DETACHED = {"callbacks": []}
+
+
+def shared_http_clients():
+    """(sync, async) httpx clients shared by every model in this process"""
+    global _http_clients
+    if _http_clients is None:
+        import httpx
+
+        limits = httpx.Limits(
+            max_connections=int(os.getenv("MODEL_HTTP_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.getenv("MODEL_HTTP_MAX_KEEPALIVE", "20")),
+            keepalive_expiry=float(os.getenv("MODEL_HTTP_KEEPALIVE_EXPIRY", "60")),
+        )
+        # HTTP/2는 h2 패키지가 설치된 경우에만 사용
+        http2 = os.getenv("MODEL_HTTP2", "1") != "0" and importlib.util.find_spec("h2") is not None
+        _http_clients = (
+            httpx.Client(limits=limits, http2=http2),
+            httpx.AsyncClient(limits=limits, http2=http2),
+        )
+    return _http_clients
+
+
+async def aclose_shared_http_clients():
+    global _http_clients
+    if _http_clients is not None:
+        sync_client, async_client = _http_clients
+        _http_clients = None
+        sync_client.close()
+        await async_client.aclose()
+
+
+def build_backend(model_name: str, base_url: Optional[str] = None, **kwargs) -> BaseChatModel:
+    """모델명에 `gpt`가 있으면 OpenAI, 아니면 vLLM 등 OpenAI 호환 서버"""
+    from langchain_openai import ChatOpenAI
+
+    openai_kwargs = kwargs.pop("openai_kwargs", None) or {}
+    kwargs["http_client"], kwargs["http_async_client"] = shared_http_clients()
+    if "gpt" in model_name or "o1" in model_name:
+        return ChatOpenAI(
+            model=model_name,
+            api_key=os.getenv("OPENAI_API_KEY"),
+            **openai_kwargs,
+            **kwargs,
+        )
+
+    kwargs.setdefault("temperature", 0.7)
+    return ChatOpenAI(
+        model=model_name,  # vLLM에서 로드한 모델명
+        base_url=base_url or os.getenv("CUSTOM_LLM_URL"),  # vLLM 서버 주소
+        api_key="EMPTY",  # vLLM은 API key 불필요
+        **kwargs,
+    )
+
+
+def select_model(model_name: Optional[str] = None, **kwargs) -> BaseChatModel:
+    """`MODEL_BACKENDS`가 있으면 라우터, 없으면 단일 모델"""
+    specs = [s.strip() for s in os.getenv("MODEL_BACKENDS", "").split(",") if s.strip()]
+    if len(specs) < 2:
+        name = specs[0] if specs else model_name
+        name, _, url = name.partition("@")
+        return build_backend(name, base_url=url or None, **kwargs)
+
+    backends = []
+    for spec in specs:
+        name, _, url = spec.partition("@")
+        backends.append(
+            Backend(spec, build_backend(name, base_url=url or None, **dict(kwargs)))
+        )
+    return RoutedChatModel(
+        backends=backends,
+        hedge=os.getenv("MODEL_HEDGE", "1") != "0",
+    )
+
+
+class BackendStats:
+    """Rolling latency / error window for one backend"""
+
+    WINDOW = 50
+    MIN_SAMPLES = 5
+    UNHEALTHY_ERROR_RATE = 0.5
+    COOLDOWN_SECONDS = 30.0
+
+    def __init__(self):
+        self.latencies: deque[float] = deque(maxlen=self.WINDOW)
+        self.outcomes: deque[bool] = deque(maxlen=self.WINDOW)
+        self.down_until = 0.0
+
+    def record_success(self, seconds: float):
+        self.latencies.append(seconds)
+        self.outcomes.append(True)
+
+    def record_error(self):
+        self.outcomes.append(False)
+        if self.error_rate >= self.UNHEALTHY_ERROR_RATE:
+            # 잠시 라우팅에서 빼고, 쿨다운 후 다시 시도해서 회복 여부 확인
+            self.down_until = time.monotonic() + self.COOLDOWN_SECONDS
+            self.outcomes.clear()
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+    def percentile(self, p: int) -> Optional[float]:
+        if len(self.latencies) < self.MIN_SAMPLES:
+            return None
+        return quantiles(self.latencies, n=100)[p - 1]
+
+    def snapshot(self) -> dict[str, Any]:
+        p50, p95 = self.percentile(50), self.percentile(95)
+        return {
+            "healthy": self.healthy,
+            "error_rate": round(self.error_rate, 3),
+            "p50_ms": None if p50 is None else round(p50 * 1000, 1),
+            "p95_ms": None if p95 is None else round(p95 * 1000, 1),
+            "samples": len(self.latencies),
+        }
+
+
+class Backend:
+    def __init__(self, name: str, model, stats: Optional[BackendStats] = None):
+        self.name = name
+        self.model = model
+        self.stats = stats or BackendStats()
+
+    def with_model(self, model) -> "Backend":
+        # bind_tools 결과도 같은 통계를 공유
+        return Backend(self.name, model, self.stats)
+
+
+class RoutedChatModel(BaseChatModel):
+    """Chat model that routes each call to the fastest healthy backend"""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    backends: list[Backend]
+    hedge: bool = True
+
+    @property
+    def _llm_type(self) -> str:
+        return "routed"
+
+    def bind_tools(self, tools, **kwargs):
+        return RoutedChatModel(
+            backends=[b.with_model(b.model.bind_tools(tools, **kwargs)) for b in self.backends],
+            hedge=self.hedge,
+        )
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        return {b.name: b.stats.snapshot() for b in self.backends}
+
+    def ranked(self) -> list[Backend]:
+        # 정상 백엔드 우선, 그다음 p50이 낮은 순 (샘플이 부족하면 설정 순서 유지)
+        def key(item):
+            i, backend = item
+            p50 = backend.stats.percentile(50)
+            return (not backend.stats.healthy, p50 if p50 is not None else 0.0, i)
+
+        return [b for _, b in sorted(enumerate(self.backends), key=key)]
+
+    async def _call(self, backend: Backend, messages, stop, **kwargs):
+        started = time.perf_counter()
+        try:
+            message = await backend.model.ainvoke(messages, _DETACHED, stop=stop, **kwargs)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            backend.stats.record_error()
+            raise
+        backend.stats.record_success(time.perf_counter() - started)
+        return message
+
+    async def _hedged(
+        self, primary: Backend, secondary: Optional[Backend], attempted: set, messages, stop, **kwargs
+    ):
+        first = asyncio.create_task(self._call(primary, messages, stop, **kwargs))
+        deadline = primary.stats.percentile(95) if self.hedge and secondary else None
+        if deadline is None:
+            return await first
+
+        done, _ = await asyncio.wait({first}, timeout=deadline)
+        if done:
+            return first.result()
+
+        # p95를 넘기면 두 번째 백엔드에도 요청하고 먼저 성공한 응답을 사용
+        attempted.add(secondary.name)
+        tasks = {first, asyncio.create_task(self._call(secondary, messages, stop, **kwargs))}
+        error: Optional[BaseException] = None
+        try:
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        order = self.ranked()
+        attempted: set[str] = set()
+        error: Optional[Exception] = None
+        for i, backend in enumerate(order):
+            if backend.name in attempted:
+                continue
+            attempted.add(backend.name)
+            secondary = next((b for b in order[i + 1 :] if b.name not in attempted), None)
+            try:
+                message = await self._hedged(
+                    backend, secondary, attempted, messages, stop, **kwargs
+                )
+                return ChatResult(generations=[ChatGeneration(message=message)])
+            except Exception as e:
+                error = e
+        raise error
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        error: Optional[Exception] = None
+        for backend in self.ranked():
+            started = time.perf_counter()
+            try:
+                message = backend.model.invoke(messages, _DETACHED, stop=stop, **kwargs)
+            except Exception as e:
+                backend.stats.record_error()
+                error = e
+                continue
+            backend.stats.record_success(time.perf_counter() - started)
+            return ChatResult(generations=[ChatGeneration(message=message)])
+        raise error
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        # 스트리밍은 hedging 없이, 첫 토큰 전에 실패한 경우에만 다음 백엔드로 넘어감
+        error: Optional[Exception] = None
+        for backend in self.ranked():
+            started = time.perf_counter()
+            streamed = False
+            try:
+                async for chunk in backend.model.astream(messages, _DETACHED, stop=stop, **kwargs):
+                    streamed = True
+                    generation = ChatGenerationChunk(message=chunk)
+                    if run_manager:
+                        await run_manager.on_llm_new_token(chunk.content, chunk=generation)
+                    yield generation
+            except Exception as e:
+                backend.stats.record_error()
+                if streamed:
+                    raise
+                error = e
+                continue
+            backend.stats.record_success(time.perf_counter() - started)
+            return
+        raise error
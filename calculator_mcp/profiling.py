@@ -0,0 +1,196 @@
+# profiling.py
+"""On-demand CPU sampling and tracemalloc allocation profiling for a running server.
+
+서버를 재시작하지 않고 정해진 시간 동안만 프로파일을 켠다.
+- CPU: 별도 스레드가 `sys._current_frames()`로 모든 스레드의 스택을 주기적으로 샘플링
+  (cProfile처럼 모든 호출을 가로채지 않으므로 켜 두어도 서버가 거의 느려지지 않음).
+  락/큐/셀렉터에서 기다리기만 하는 스레드는 비율에 넣지 않고 idle로 따로 셈.
+- 메모리: 시작/종료 시점의 `tracemalloc` 스냅샷을 비교해 할당이 늘어난 위치를 보여줌.
+
+    session = ProfileSession()
+    session.start(seconds=10)
+    ...
+    print(session.stop().format(top=20))
+"""
+import os
+import selectors
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Optional
+
+SAMPLE_INTERVAL = float(os.getenv("CALC_PROFILE_INTERVAL", "0.005"))
+MAX_SECONDS = float(os.getenv("CALC_PROFILE_MAX_SECONDS", "60"))
+TRACE_FRAMES = int(os.getenv("CALC_PROFILE_TRACE_FRAMES", "1"))
+
+_Func = tuple[str, int, str]
+
+# 스택 맨 위가 이 함수들이면 일하지 않고 대기 중인 스레드
+# (Timer·Event.wait, queue.Queue.get, ThreadPoolExecutor의 빈 작업 큐, 이벤트 루프의 select)
+_IDLE_FUNCS = {
+    (threading.__file__, "wait"),
+    (selectors.__file__, "select"),
+    (os.path.join(os.path.dirname(threading.__file__), "queue.py"), "get"),
+    (os.path.join(os.path.dirname(threading.__file__), "concurrent", "futures", "thread.py"), "_worker"),
+}
+
+
+def _describe(func: _Func) -> str:
+    filename, lineno, name = func
+    return f"{name} ({os.path.basename(filename)}:{lineno})"
+
+
+class SamplingProfiler:
+    """Samples the stacks of all busy threads except its own every `interval` seconds"""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.samples = 0
+        self.idle = 0
+        # self: 스택 맨 위(실제로 실행 중)인 함수, total: 스택 어딘가에 있는 함수
+        self.self_counts: Counter[_Func] = Counter()
+        self.total_counts: Counter[_Func] = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="calc-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                self._sample(frame)
+
+    def _sample(self, frame):
+        code = frame.f_code
+        if (code.co_filename, code.co_name) in _IDLE_FUNCS:
+            self.idle += 1
+            return
+        self.samples += 1
+        seen = set()
+        leaf = True
+        while frame is not None:
+            code = frame.f_code
+            func = (code.co_filename, code.co_firstlineno, code.co_name)
+            if leaf:
+                self.self_counts[func] += 1
+                leaf = False
+            # 재귀 호출은 샘플당 한 번만 셈
+            if func not in seen:
+                seen.add(func)
+                self.total_counts[func] += 1
+            frame = frame.f_back
+
+
+class ProfileReport:
+    def __init__(self, seconds: float, cpu: Optional[SamplingProfiler], allocations: list):
+        self.seconds = seconds
+        self.cpu = cpu
+        self.allocations = allocations
+
+    def format(self, top: int = 20) -> str:
+        lines = [f"⏱️ 프로파일 {self.seconds:.1f}초"]
+        if self.cpu is not None:
+            samples = max(self.cpu.samples, 1)
+            lines.append(
+                f"\n[CPU] 샘플 {self.cpu.samples}개, 대기 중 제외 {self.cpu.idle}개 "
+                f"(간격 {self.cpu.interval * 1000:g}ms)"
+            )
+            lines.append("  self%  total%  function")
+            for func, count in self.cpu.self_counts.most_common(top):
+                total = self.cpu.total_counts[func]
+                lines.append(
+                    f"  {count / samples:6.1%} {total / samples:6.1%}  {_describe(func)}"
+                )
+        if self.allocations:
+            lines.append("\n[메모리] 구간 동안 늘어난 할당 위치")
+            lines.append("  size_diff  count_diff  location")
+            for stat in self.allocations[:top]:
+                frame = stat.traceback[0]
+                lines.append(
+                    f"  {stat.size_diff / 1024:8.1f}KiB {stat.count_diff:+10d}  "
+                    f"{os.path.basename(frame.filename)}:{frame.lineno}"
+                )
+        return "\n".join(lines)
+
+
+class ProfileSession:
+    """At most one profiling window at a time; stops itself after `seconds`"""
+
+    def __init__(self):
+        self.report: Optional[ProfileReport] = None
+        self._lock = threading.Lock()
+        self._cpu: Optional[SamplingProfiler] = None
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._owns_tracemalloc = False
+        self._started = 0.0
+        self._timer: Optional[threading.Timer] = None
+
+    @property
+    def running(self) -> bool:
+        return self._started > 0
+
+    def start(self, seconds: float, cpu: bool = True, memory: bool = True) -> float:
+        """프로파일 시작, 실제 적용된 시간(최대 MAX_SECONDS)을 반환. 이미 실행 중이면 RuntimeError"""
+        seconds = min(max(seconds, 0.1), MAX_SECONDS)
+        with self._lock:
+            if self.running:
+                raise RuntimeError("profile already running")
+            if memory:
+                # 이미 켜 둔 tracemalloc(PYTHONTRACEMALLOC 등)은 끄지 않음
+                self._owns_tracemalloc = not tracemalloc.is_tracing()
+                if self._owns_tracemalloc:
+                    tracemalloc.start(TRACE_FRAMES)
+                self._snapshot = tracemalloc.take_snapshot()
+            if cpu:
+                self._cpu = SamplingProfiler()
+                self._cpu.start()
+            self._started = time.perf_counter()
+            self._timer = threading.Timer(seconds, self.stop)
+            self._timer.daemon = True
+            self._timer.start()
+        return seconds
+
+    def stop(self) -> Optional[ProfileReport]:
+        """프로파일을 멈추고 결과를 반환 (이미 멈췄으면 마지막 결과)"""
+        with self._lock:
+            if not self.running:
+                return self.report
+            if self._timer is not None:
+                self._timer.cancel()
+            elapsed = time.perf_counter() - self._started
+            # 스냅샷 비교 작업이 CPU 샘플에 섞이지 않도록 샘플링부터 멈춤
+            if self._cpu is not None:
+                self._cpu.stop()
+            allocations = []
+            if self._snapshot is not None:
+                snapshot = tracemalloc.take_snapshot().filter_traces(
+                    [
+                        tracemalloc.Filter(False, tracemalloc.__file__),
+                        # 샘플러의 Counter 등 프로파일러 자신의 할당은 제외
+                        tracemalloc.Filter(False, __file__),
+                    ]
+                )
+                allocations = [
+                    stat
+                    for stat in snapshot.compare_to(self._snapshot, "lineno")
+                    if stat.size_diff > 0
+                ]
+                if self._owns_tracemalloc:
+                    tracemalloc.stop()
+            self.report = ProfileReport(elapsed, self._cpu, allocations)
+            self._cpu, self._snapshot, self._timer = None, None, None
+            self._owns_tracemalloc = False
+            self._started = 0.0
+            return self.report
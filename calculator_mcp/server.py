@@ -0,0 +1,1782 @@
+# server.py
+import time
+
+_IMPORT_START = time.perf_counter()
+
+from fastmcp import FastMCP
+from fastmcp.exceptions import ResourceError, ToolError
+from fastmcp.server.dependencies import get_context
+from fastmcp.server.middleware import Middleware, MiddlewareContext
+import argparse
+import asyncio
+import atexit
+import hmac
+import json
+import logging
+import math
+import operator
+import os
+import pickle
+import shutil
+import tempfile
+from bisect import bisect_left
+from collections import Counter, OrderedDict, deque
+from itertools import chain
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import AsyncIterator, Callable, Iterator, Optional
+from urllib.parse import quote
+from pydantic import AnyUrl
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
+
+from .profiling import ProfileSession
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_START
+
+mcp = FastMCP("PersonalCalculator")
+
+
+class Rollups:
+    """Per-minute/hour/day (count, sum) buckets per operation, 증분 유지"""
+
+    GRANULARITIES = {"minute": 60, "hour": 3600, "day": 86400}
+
+    def __init__(self):
+        # seconds → bucket 시작 시각 → operation → [count, sum]
+        self.buckets: dict[int, dict[int, dict[str, list]]] = {
+            g: {} for g in self.GRANULARITIES.values()
+        }
+
+    def add(self, timestamp: float, operation: str, result: float, sign: int = 1):
+        for seconds, buckets in self.buckets.items():
+            start = int(timestamp // seconds * seconds)
+            ops = buckets.setdefault(start, {})
+            cell = ops.setdefault(operation, [0, 0.0])
+            cell[0] += sign
+            cell[1] += sign * result
+            if not cell[0]:
+                del ops[operation]
+                if not ops:
+                    del buckets[start]
+
+    def copy(self) -> "Rollups":
+        clone = Rollups()
+        clone.buckets = {
+            seconds: {
+                start: {op: list(cell) for op, cell in ops.items()}
+                for start, ops in buckets.items()
+            }
+            for seconds, buckets in self.buckets.items()
+        }
+        return clone
+
+    def bucket(self, seconds: int, start: int, op: Optional[str]) -> tuple[int, float]:
+        ops = self.buckets[seconds].get(start)
+        if not ops:
+            return 0, 0.0
+        if op is not None:
+            count, total = ops.get(op, (0, 0.0))
+            return count, total
+        return sum(c for c, _ in ops.values()), math.fsum(t for _, t in ops.values())
+
+
+class FoldedHistory:
+    """Aggregates of old rows compacted out of a HistoryLog (개별 행은 없음)"""
+
+    def __init__(self):
+        self.count = 0
+        self.op_counts: Counter[str] = Counter()
+        self.rollups = Rollups()
+        self.first_timestamp: Optional[float] = None
+        self.last_timestamp: Optional[float] = None
+
+    def add(self, operation: str, result: float, timestamp: float):
+        self.count += 1
+        self.op_counts[operation] += 1
+        self.rollups.add(timestamp, operation, result)
+        if self.first_timestamp is None:
+            self.first_timestamp = timestamp
+        self.last_timestamp = timestamp
+
+    def copy(self) -> "FoldedHistory":
+        clone = FoldedHistory()
+        clone.count = self.count
+        clone.op_counts = Counter(self.op_counts)
+        clone.rollups = self.rollups.copy()
+        clone.first_timestamp = self.first_timestamp
+        clone.last_timestamp = self.last_timestamp
+        return clone
+
+
+# 보존 정책(바이트 기준)에 쓰는 행당 메모리 추정치
+ROW_BYTES = 160
+VALUE_BYTES = 32
+
+
+_NUMERIC_TYPES = {int, float}
+
+
+def _row_bytes(values) -> int:
+    return ROW_BYTES + VALUE_BYTES * len(values)
+
+
+class HistoryLog:
+    """Columnar calculation history (operation / values / result / timestamp 열 단위 저장)
+
+    오래된 행은 `compact`로 `folded` 집계에 합쳐질 수 있다. 행 단위 열(`len`)에는 남은
+    행만 있고, `count`/`op_counts`/`query`는 합쳐진 행까지 포함해서 정확하다.
+    합쳐진 앞부분은 바로 지우지 않고 시작 위치(`_head`)만 옮긴다.
+    """
+
+    # 앞쪽의 합쳐진 행이 이만큼 넘게 쌓이고 남은 행 수 이상이 되면 열을 실제로 줄임
+    # (줄이는 비용은 남은 행 수에 비례하므로 합친 행 하나당 O(1)로 분산됨)
+    TRIM_MIN = 4096
+
+    def __init__(
+        self, operations=None, values=None, results=None, timestamps=None, folded=None
+    ):
+        self.operations: list[str] = operations if operations is not None else []
+        self.values: list[tuple[float, ...]] = values if values is not None else []
+        self.results: list[float] = results if results is not None else []
+        # 항상 오름차순으로 유지되는 정렬 인덱스 → 범위 조회는 bisect로
+        self.timestamps: list[float] = timestamps if timestamps is not None else []
+        self.folded: FoldedHistory = folded if folded is not None else FoldedHistory()
+        self.op_counts: Counter[str] = Counter(self.operations) + self.folded.op_counts
+        # rollups는 남아 있는 행만, 합쳐진 행은 folded.rollups에 있음
+        self.rollups = Rollups()
+        for op, res, ts in zip(self.operations, self.results, self.timestamps):
+            self.rollups.add(ts, op, res)
+        self.nbytes = sum(_row_bytes(vals) for vals in self.values)
+        # 열 인덱스 _head부터가 현재 행 (그 앞은 이미 folded에 합쳐진 행)
+        self._head = 0
+        # 고정(pin)된 view가 공유 중인 열 끝 위치별 개수 (이 아래를 바꾸려면 먼저 복사)
+        self._pins: Counter[int] = Counter()
+
+    @property
+    def _pinned(self) -> int:
+        return max(self._pins) if self._pins else 0
+
+    @property
+    def count(self) -> int:
+        """합쳐진 행까지 포함한 전체 계산 횟수"""
+        return self.folded.count + len(self)
+
+    def __len__(self):
+        return len(self.results) - self._head
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __iter__(self):
+        for i in range(self._head, len(self.results)):
+            yield {
+                "operation": self.operations[i],
+                "values": list(self.values[i]),
+                "result": self.results[i],
+                "timestamp": self.timestamps[i],
+            }
+
+    def append(self, operation: str, values, result: float, timestamp: Optional[float] = None):
+        values = tuple(values)
+        # 열 중 하나만 추가되고 실패하는 일이 없도록 변경 전에 검사
+        # (큰 목록은 대부분 float뿐이므로 타입 집합으로 먼저 보고, 아닐 때만 하나씩 isinstance)
+        if not isinstance(result, (int, float)) or not (
+            set(map(type, values)) <= _NUMERIC_TYPES
+            or all(isinstance(v, (int, float)) for v in values)
+        ):
+            raise TypeError(f"history row must be numeric: {operation} {values!r} = {result!r}")
+        if timestamp is None:
+            timestamp = time.time()
+        if self.timestamps and timestamp < self.timestamps[-1]:
+            # 시계가 뒤로 가도 인덱스 정렬이 깨지지 않도록 보정
+            timestamp = self.timestamps[-1]
+        self.operations.append(operation)
+        self.values.append(values)
+        self.results.append(result)
+        self.timestamps.append(timestamp)
+        self.op_counts[operation] += 1
+        self.rollups.add(timestamp, operation, result)
+        self.nbytes += _row_bytes(values)
+
+    def pop(self) -> tuple[str, tuple[float, ...], float, float]:
+        if not self:
+            raise IndexError("pop from empty history")
+        if len(self.results) <= self._pinned:
+            self._detach()
+        operation = self.operations.pop()
+        values = self.values.pop()
+        result = self.results.pop()
+        timestamp = self.timestamps.pop()
+        self.op_counts[operation] -= 1
+        if not self.op_counts[operation]:
+            del self.op_counts[operation]
+        self.rollups.add(timestamp, operation, result, sign=-1)
+        self.nbytes -= _row_bytes(values)
+        return operation, values, result, timestamp
+
+    def compact(self, n: int) -> int:
+        """가장 오래된 행 n개를 folded 집계로 합치고 실제로 합친 수를 반환 (O(n), 분할 상환)"""
+        n = min(n, len(self))
+        if n <= 0:
+            return 0
+        head = self._head
+        for i in range(head, head + n):
+            op, res, ts = self.operations[i], self.results[i], self.timestamps[i]
+            self.rollups.add(ts, op, res, sign=-1)
+            self.folded.add(op, res, ts)
+            self.nbytes -= _row_bytes(self.values[i])
+        # 행은 그대로 두고 시작 위치만 옮기므로 view가 보고 있는 열도 바뀌지 않음
+        self._head = head + n
+        if self._head >= self.TRIM_MIN and self._head >= len(self):
+            self._trim()
+        return n
+
+    def rows_before(self, timestamp: float) -> int:
+        """timestamp보다 이전인 현재 행 수"""
+        return bisect_left(self.timestamps, timestamp, lo=self._head) - self._head
+
+    def _trim(self):
+        head = self._head
+        if self._pins:
+            # view가 보고 있는 열은 그대로 두고 새 열로 교체
+            self.operations = self.operations[head:]
+            self.values = self.values[head:]
+            self.results = self.results[head:]
+            self.timestamps = self.timestamps[head:]
+            self._pins.clear()
+        else:
+            del self.operations[:head]
+            del self.values[:head]
+            del self.results[:head]
+            del self.timestamps[:head]
+        self._head = 0
+
+    def view(self, pin: bool = False) -> "HistoryView":
+        """O(1) read-only view of the current rows
+
+        고정하지 않은 view는 만든 자리에서 바로(await 없이) 읽을 때만 쓴다.
+        `pin=True`면 이후 undo/compact가 view의 행을 바꾸기 전에 열을 복사하므로
+        나중에 읽어도 안전하다. 다 쓰면 `release()`로 풀어서 그 복사 비용을 없앤다.
+        """
+        columns = (self.operations, self.values, self.results, self.timestamps)
+        view = HistoryView(*columns, self._head, len(self), self.folded.count)
+        if pin:
+            self._pins[len(self.results)] += 1
+            view._owner = self
+        return view
+
+    def snapshot(self) -> "HistoryView":
+        """Pinned view that can be materialized back into a HistoryLog (스냅샷용)"""
+        view = self.view(pin=True)
+        view.folded = self.folded.copy()
+        return view
+
+    def _unpin(self, view: "HistoryView"):
+        # 이미 복사(_detach)된 뒤라면 view는 옛 열을 혼자 가지고 있으므로 풀 pin이 없음
+        if view._columns[2] is not self.results:
+            return
+        end = view._start + len(view)
+        self._pins[end] -= 1
+        if self._pins[end] <= 0:
+            del self._pins[end]
+
+    def query(self, since: float, until: float, op: Optional[str] = None) -> tuple[int, float]:
+        """[since, until) 구간의 (횟수, 결과 합계)
+
+        구간 안에 완전히 들어가는 day/hour/minute 버킷은 미리 집계된 값을 쓰고,
+        1분 미만인 양 끝만 bisect로 찾은 행을 직접 더한다 (전체 기록을 훑지 않음).
+        compact로 합쳐진 구간은 행이 없으므로 양 끝도 분 단위로 계산한다.
+        """
+        if not self.count:
+            return 0, 0.0
+        first = self.folded.first_timestamp if self.folded.count else self.timestamps[self._head]
+        last = self.timestamps[-1] if self else self.folded.last_timestamp
+        lo = max(since, math.floor(first))
+        hi = min(until, math.floor(last) + 1)
+
+        count, parts = 0, []
+        t = lo
+        while t < hi:
+            for seconds in (86400, 3600, 60):
+                if t % seconds == 0 and t + seconds <= hi:
+                    c, total = self.rollups.bucket(seconds, int(t), op)
+                    folded_c, folded_total = self.folded.rollups.bucket(seconds, int(t), op)
+                    c, total = c + folded_c, total + folded_total
+                    t += seconds
+                    break
+            else:
+                edge = min(hi, (t // 60 + 1) * 60)
+                c, total = self._scan(t, edge, op)
+                t = edge
+            count += c
+            parts.append(total)
+        return count, math.fsum(parts)
+
+    def _scan(self, since: float, until: float, op: Optional[str]) -> tuple[int, float]:
+        i = bisect_left(self.timestamps, since, lo=self._head)
+        j = bisect_left(self.timestamps, until, lo=i)
+        rows = [
+            self.results[k] for k in range(i, j) if op is None or self.operations[k] == op
+        ]
+        count, total = len(rows), math.fsum(rows)
+        if self.folded.count and since <= self.folded.last_timestamp:
+            folded_c, folded_total = self.folded.rollups.bucket(60, int(since // 60 * 60), op)
+            count, total = count + folded_c, total + folded_total
+        return count, total
+
+    def _detach(self):
+        # copy-on-write: 스냅샷이 보고 있는 열을 건드리기 전에 (현재 행만) 복사
+        head = self._head
+        self.operations = self.operations[head:]
+        self.values = self.values[head:]
+        self.results = self.results[head:]
+        self.timestamps = self.timestamps[head:]
+        self._head = 0
+        self._pins.clear()
+
+
+class HistoryView:
+    """Row range of a HistoryLog shared with the live columns (복사 없음)"""
+
+    def __init__(
+        self, operations, values, results, timestamps, start: int, length: int, folded_count: int
+    ):
+        self._columns = (operations, values, results, timestamps)
+        self._start = start
+        self._length = length
+        # 이 view의 행보다 앞에서 compact로 합쳐진 행 수 (전체 순번 계산용)
+        self.folded_count = folded_count
+        # snapshot()으로 만든 view만 가짐 (materialize용)
+        self.folded: Optional[FoldedHistory] = None
+        self._owner: Optional[HistoryLog] = None
+
+    def __len__(self):
+        return self._length
+
+    def rows(self, start: int = 0, stop: Optional[int] = None):
+        operations, values, results, timestamps = self._columns
+        stop = self._length if stop is None else min(stop, self._length)
+        # 인덱스로 바로 접근하므로 뒤쪽 페이지도 앞부분을 건너뛰는 비용이 없음
+        base = self._start
+        return (
+            (operations[i], values[i], results[i], timestamps[i])
+            for i in range(base + start, base + stop)
+        )
+
+    def release(self):
+        """pin 해제 (고정하지 않은 view에서는 아무 일도 하지 않음)"""
+        if self._owner is not None:
+            self._owner._unpin(self)
+            self._owner = None
+
+    def materialize(self) -> HistoryLog:
+        a, b = self._start, self._start + self._length
+        return HistoryLog(*(column[a:b] for column in self._columns), folded=self.folded.copy())
+
+
+class CalculatorState:
+    UNDO_DEPTH = 100
+    # 변경 이벤트에는 인자 앞부분만 담음 (큰 목록 전체를 구독자마다 복사/직렬화하지 않도록)
+    EVENT_VALUES = 16
+
+    def __init__(self):
+        self.history = HistoryLog()
+        self.total: float = 0.0
+        self.snapshots: dict[str, tuple[HistoryView, float]] = {}
+        # ("record", prev_total, next_total, entry) 또는 ("swap", history, total, label)
+        self._undo: deque[tuple] = deque(maxlen=self.UNDO_DEPTH)
+        self._redo: deque[tuple] = deque(maxlen=self.UNDO_DEPTH)
+        # 상태가 바뀔 때마다 호출되는 콜백 (event dict 하나를 인자로 받음)
+        self.listeners: list = []
+
+    def __getstate__(self):
+        # 디스크로 내릴 때 콜백은 저장하지 않음 (다시 불러올 때 registry가 연결)
+        data = self.__dict__.copy()
+        data["listeners"] = []
+        return data
+
+    def _changed(self, event: str, **data):
+        for listener in self.listeners:
+            listener({"event": event, "total": self.total, "count": self.history.count, **data})
+
+    def record(self, operation: str, values, result: float):
+        prev_total = self.total
+        self.history.append(operation, values, result)
+        self.total += result
+        self._undo.append(("record", prev_total, self.total, None))
+        self._redo.clear()
+        row = self.history.values[-1]
+        self._changed(
+            "record",
+            operation=operation,
+            values=list(row[: self.EVENT_VALUES]),
+            size=len(row),
+            result=result,
+        )
+
+    def reset(self):
+        self._swap(HistoryLog(), 0.0, "reset")
+
+    def drop_snapshots(self):
+        for view, _ in self.snapshots.values():
+            view.release()
+        self.snapshots.clear()
+
+    def save_snapshot(self, name: str):
+        previous = self.snapshots.get(name)
+        if previous is not None:
+            previous[0].release()
+        self.snapshots[name] = (self.history.snapshot(), self.total)
+
+    def restore_snapshot(self, name: str) -> bool:
+        if name not in self.snapshots:
+            return False
+        view, total = self.snapshots[name]
+        self._swap(view.materialize(), total, f"restore:{name}")
+        return True
+
+    def undo(self) -> Optional[str]:
+        """마지막 변경을 되돌리고 그 종류를 반환 (기록 재계산 없이 O(1))"""
+        undone = self._undo_once()
+        if undone is not None:
+            self._changed("undo", target=undone)
+        return undone
+
+    def redo(self) -> Optional[str]:
+        redone = self._redo_once()
+        if redone is not None:
+            self._changed("redo", target=redone)
+        return redone
+
+    def _undo_once(self) -> Optional[str]:
+        if not self._undo:
+            return None
+        kind, *payload = self._undo.pop()
+        if kind == "record":
+            prev_total, next_total, _ = payload
+            entry = self.history.pop()
+            self.total = prev_total
+            self._redo.append(("record", prev_total, next_total, entry))
+            return entry[0]
+        history, total, label = payload
+        self._redo.append(("swap", self.history, self.total, label))
+        self.history, self.total = history, total
+        return label
+
+    def _redo_once(self) -> Optional[str]:
+        if not self._redo:
+            return None
+        kind, *payload = self._redo.pop()
+        if kind == "record":
+            prev_total, next_total, entry = payload
+            self.history.append(*entry)
+            self.total = next_total
+            self._undo.append(("record", prev_total, next_total, None))
+            return entry[0]
+        history, total, label = payload
+        self._undo.append(("swap", self.history, self.total, label))
+        self.history, self.total = history, total
+        return label
+
+    def _swap(self, history: HistoryLog, total: float, label: str):
+        # 이전 기록 객체를 통째로 보관하므로 초기화/복원도 O(1)로 되돌릴 수 있음
+        self._undo.append(("swap", self.history, self.total, label))
+        self._redo.clear()
+        self.history = history
+        self.total = total
+        self._changed(label)
+
+
+def current_session() -> str:
+    """MCP 세션 ID (요청 context가 없는 임베디드/직접 호출은 "local")"""
+    try:
+        return get_context().session_id
+    except RuntimeError:
+        return "local"
+
+
+class CalculatorRegistry:
+    """Named calculators kept in an LRU index; 오래 안 쓴 계산기는 디스크로 내림
+
+    계산기는 서버 전체에서 공유하지만, 현재 계산기(`active`)는 세션마다 따로 기억한다.
+    """
+
+    DEFAULT = "default"
+    # 현재 계산기를 기억할 최대 세션 수 (오래된 세션부터 잊음)
+    MAX_SESSIONS = 10000
+
+    def __init__(
+        self,
+        max_loaded: int,
+        spill_dir: Optional[str] = None,
+        session: Callable[[], str] = lambda: "local",
+    ):
+        self.max_loaded = max(1, max_loaded)
+        # 지정하지 않으면 처음 내릴 때 이 프로세스 전용 임시 디렉터리를 만듦
+        self.spill_dir: Optional[Path] = Path(spill_dir) if spill_dir else None
+        self.listeners: list = []
+        self._session = session
+        self._active: OrderedDict[str, str] = OrderedDict()
+        self._loaded: OrderedDict[str, CalculatorState] = OrderedDict()
+        self._spilled: set[str] = set()
+
+    @property
+    def active(self) -> str:
+        """이 요청을 보낸 세션의 현재 계산기 이름"""
+        return self._active.get(self._session(), self.DEFAULT)
+
+    @active.setter
+    def active(self, name: str):
+        session = self._session()
+        self._active[session] = name
+        self._active.move_to_end(session)
+        if len(self._active) > self.MAX_SESSIONS:
+            self._active.popitem(last=False)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._loaded or name in self._spilled
+
+    def __len__(self):
+        return len(self._loaded) + len(self._spilled)
+
+    def names(self) -> list[str]:
+        return sorted([*self._loaded, *self._spilled])
+
+    def loaded(self) -> list[tuple[str, CalculatorState]]:
+        """메모리에 있는 계산기 (디스크로 내려간 계산기는 불러오지 않음)"""
+        return list(self._loaded.items())
+
+    def peek(self, name: str) -> Optional[CalculatorState]:
+        """메모리에 있는 계산기만 LRU 순서를 바꾸지 않고 반환"""
+        return self._loaded.get(name)
+
+    def create(self, name: str) -> CalculatorState:
+        if name in self:
+            raise KeyError(name)
+        calc = CalculatorState()
+        self._attach(name, calc)
+        self._evict()
+        return calc
+
+    def get(self, name: Optional[str] = None) -> CalculatorState:
+        """이름으로 계산기 조회 (생략하면 현재 계산기). 없으면 KeyError"""
+        name = name or self.active
+        calc = self._loaded.get(name)
+        if calc is not None:
+            self._loaded.move_to_end(name)
+            return calc
+        if name not in self._spilled:
+            raise KeyError(name)
+
+        path = self._path(name)
+        with path.open("rb") as f:
+            calc = pickle.load(f)
+        path.unlink()
+        self._spilled.discard(name)
+        self._attach(name, calc)
+        self._evict()
+        return calc
+
+    def reset_all(self):
+        """모든 계산기의 기록·합계·스냅샷을 비우고 모든 세션을 기본 계산기로 되돌림"""
+        for name in list(self._spilled):
+            # 디스크로 내려간 계산기는 불러오지 않고 빈 계산기로 바꿈
+            self._path(name).unlink(missing_ok=True)
+            self._spilled.discard(name)
+            self._attach(name, CalculatorState())
+        for calc in list(self._loaded.values()):
+            calc.drop_snapshots()
+            calc.reset()
+        self._active.clear()
+        self._evict()
+
+    def _attach(self, name: str, calc: CalculatorState):
+        calc.listeners.append(lambda event: self._publish(name, event))
+        self._loaded[name] = calc
+
+    def _publish(self, name: str, event: dict):
+        event["calculator"] = name
+        for listener in self.listeners:
+            listener(event)
+
+    def _evict(self):
+        # 어느 세션이든 현재 계산기로 쓰는 중이면 메모리에 유지
+        in_use = {self.DEFAULT, self.active, *self._active.values()}
+        while len(self._loaded) > self.max_loaded:
+            name = next((n for n in self._loaded if n not in in_use), None)
+            if name is None:
+                break
+            calc = self._loaded.pop(name)
+            self._prepare_spill_dir()
+            with self._path(name).open("wb") as f:
+                pickle.dump(calc, f, protocol=pickle.HIGHEST_PROTOCOL)
+            self._spilled.add(name)
+            logger.info(f"Calculator '{name}' spilled to disk")
+
+    def _prepare_spill_dir(self):
+        if self.spill_dir is None:
+            # 예측 가능한 공유 경로를 쓰면 다른 사용자가 미리 만든 디렉터리에 pickle을 심을 수
+            # 있으므로, mkdtemp로 소유자만 접근 가능한(0700) 새 디렉터리를 만들고 종료 시 삭제
+            self.spill_dir = Path(tempfile.mkdtemp(prefix="calculators-"))
+            atexit.register(shutil.rmtree, self.spill_dir, ignore_errors=True)
+        else:
+            self.spill_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+
+    def _path(self, name: str) -> Path:
+        return self.spill_dir / f"{quote(name, safe='')}.pkl"
+
+
+class SessionState:
+    """User profile plus the named calculators of this server"""
+
+    def __init__(self, calculators: CalculatorRegistry):
+        self.user_name: Optional[str] = None
+        self.calculators = calculators
+        calculators.create(calculators.DEFAULT)
+
+    @property
+    def calc(self) -> CalculatorState:
+        return self.calculators.get()
+
+
+state = SessionState(
+    CalculatorRegistry(
+        max_loaded=int(os.getenv("CALC_MAX_LOADED", "16")),
+        session=current_session,
+        spill_dir=os.getenv("CALC_SPILL_DIR"),
+    )
+)
+
+
+class PoolBusyError(RuntimeError):
+    pass
+
+
+class WorkerPool:
+    """Bounded executor for CPU-heavy tools (이벤트 루프를 막지 않도록 오프로드)"""
+
+    def __init__(self, workers: int, max_pending: int, kind: str = "thread"):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.kind = kind
+        self.pending = 0
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="calc-worker"
+                )
+        return self._executor
+
+    async def run(self, fn, *args):
+        # 대기열이 가득 차면 줄 세우지 않고 즉시 거절 (backpressure)
+        if self.pending >= self.max_pending:
+            raise PoolBusyError(f"worker pool is full ({self.pending} pending)")
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.pending -= 1
+
+
+pool = WorkerPool(
+    workers=int(os.getenv("CALC_POOL_WORKERS", "4")),
+    max_pending=int(os.getenv("CALC_POOL_MAX_PENDING", "32")),
+    kind=os.getenv("CALC_POOL_KIND", "thread"),
+)
+
+# 이보다 작은 입력은 오프로드 비용이 더 크므로 루프에서 바로 계산
+OFFLOAD_THRESHOLD = int(os.getenv("CALC_OFFLOAD_THRESHOLD", "10000"))
+BUSY_MESSAGE = "⏳ 서버가 바쁩니다. 잠시 후 다시 시도해주세요."
+
+
+async def run_heavy(fn, *args, size: int = 0):
+    if size < OFFLOAD_THRESHOLD:
+        return fn(*args)
+    return await pool.run(fn, *args)
+
+
+class MemoCache:
+    """Bounded LRU of pure tool results keyed on (operation, normalized args)
+
+    항목 수와 key에 들어 있는 숫자 개수 합계를 모두 제한해서, 큰 목록 집계를
+    캐시하더라도 메모리가 무한히 늘지 않도록 한다.
+    """
+
+    # 인자 순서와 무관한 연산은 정렬해서 같은 key로 취급 (부동소수점에서도 교환법칙 성립)
+    COMMUTATIVE = {"add", "multiply", "percentage", "calculate_sum", "find_max", "find_min"}
+
+    def __init__(self, max_entries: int, max_values: int):
+        self.max_entries = max_entries
+        self.max_values = max_values
+        self.values = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[tuple, float] = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def key(self, operation: str, args) -> tuple:
+        args = tuple(map(float, args))
+        if operation in self.COMMUTATIVE:
+            args = tuple(sorted(args))
+        return operation, args
+
+    def get(self, key: tuple) -> Optional[float]:
+        result = self._entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, key: tuple, result: float):
+        size = len(key[1])
+        if self.max_entries <= 0 or size > self.max_values or key in self._entries:
+            return
+        self._entries[key] = result
+        self.values += size
+        while len(self._entries) > self.max_entries or self.values > self.max_values:
+            (_, args), _ = self._entries.popitem(last=False)
+            self.values -= len(args)
+            self.evictions += 1
+
+    def compute(self, operation: str, args, fn) -> float:
+        """캐시에 있으면 그 값을, 없으면 fn(*args)를 계산해서 저장 (동기 연산용)"""
+        key = self.key(operation, args)
+        result = self.get(key)
+        if result is None:
+            # key와 같은 float 인자로 계산 → 캐시에는 float 결과만 들어감
+            result = fn(*map(float, args))
+            self.put(key, result)
+        return result
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+memo = MemoCache(
+    max_entries=int(os.getenv("CALC_MEMO_SIZE", "1024")),
+    max_values=int(os.getenv("CALC_MEMO_MAX_VALUES", "1000000")),
+)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def try_acquire(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class AdmissionControl(Middleware):
+    """Per-session/per-tool token buckets plus a global in-flight cap"""
+
+    MAX_BUCKETS = 10_000
+
+    def __init__(
+        self,
+        session_rate: float,
+        session_burst: float,
+        tool_rate: float,
+        tool_burst: float,
+        max_in_flight: int,
+    ):
+        self.session_rate = session_rate
+        self.session_burst = session_burst
+        self.tool_rate = tool_rate
+        self.tool_burst = tool_burst
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.rejected: Counter[str] = Counter()
+        # 오래 쓰지 않은 bucket부터 버려서 메모리 상한 유지 (LRU)
+        self._buckets: OrderedDict[tuple, TokenBucket] = OrderedDict()
+
+    def _bucket(self, key: tuple, rate: float, burst: float) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(rate, burst)
+            if len(self._buckets) > self.MAX_BUCKETS:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+    def _reject(self, reason: str, message: str):
+        self.rejected[reason] += 1
+        raise ToolError(message)
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        ctx = context.fastmcp_context
+        session = ctx.session_id if ctx else "anonymous"
+        tool = context.message.name
+
+        # 과부하 시에는 대기시키지 않고 바로 거절해서 다른 세션의 지연을 지킴
+        if self.in_flight >= self.max_in_flight:
+            self._reject("overload", "⏳ 서버 과부하 상태입니다. 잠시 후 다시 시도해주세요.")
+        if not self._bucket((session,), self.session_rate, self.session_burst).try_acquire():
+            self._reject("session", "🚦 요청이 너무 많습니다. 잠시 후 다시 시도해주세요.")
+        if not self._bucket((session, tool), self.tool_rate, self.tool_burst).try_acquire():
+            self._reject("tool", f"🚦 '{tool}' 호출이 너무 잦습니다. 잠시 후 다시 시도해주세요.")
+
+        self.in_flight += 1
+        try:
+            return await call_next(context)
+        finally:
+            self.in_flight -= 1
+
+
+admission = AdmissionControl(
+    session_rate=float(os.getenv("CALC_SESSION_RATE", "20")),
+    session_burst=float(os.getenv("CALC_SESSION_BURST", "40")),
+    tool_rate=float(os.getenv("CALC_TOOL_RATE", "10")),
+    tool_burst=float(os.getenv("CALC_TOOL_BURST", "20")),
+    max_in_flight=int(os.getenv("CALC_MAX_IN_FLIGHT", "64")),
+)
+mcp.add_middleware(admission)
+
+
+def _average(numbers: list[float]) -> float:
+    return math.fsum(numbers) / len(numbers)
+
+
+def _format_history(header: str, view: HistoryView) -> str:
+    result = [header]
+    if view.folded_count:
+        result.append(f"(오래된 기록 {view.folded_count}개는 통계로만 보관)")
+    for i, (op, vals, res, _) in enumerate(view.rows(), view.folded_count + 1):
+        result.append(f"{i}. {op}: {' → '.join(map(str, vals))} = {res}")
+    return "\n".join(result)
+
+
+@mcp.tool()
+def set_user_name(name: str) -> str:
+    """Set your name for personalized calculator experience"""
+    state.user_name = name
+    logger.info(f"User name set to: {name}")
+    return f"안녕하세요, {name}님! 계산기를 시작합니다."
+
+
+@mcp.tool()
+def get_user_name() -> str:
+    """Get current user name"""
+    if state.user_name:
+        return f"현재 사용자: {state.user_name}"
+    else:
+        return "아직 이름이 설정되지 않았습니다."
+
+
+@mcp.tool()
+def add(a: float, b: float) -> str:
+    """Add two numbers"""
+    result = memo.compute("add", (a, b), operator.add)
+    state.calc.record("add", (a, b), result)
+
+    greeting = f"{state.user_name}님, " if state.user_name else ""
+    return f"{greeting}{a} + {b} = {result}"
+
+
+@mcp.tool()
+def subtract(a: float, b: float) -> str:
+    """Subtract b from a"""
+    result = memo.compute("subtract", (a, b), operator.sub)
+    state.calc.record("subtract", (a, b), result)
+
+    greeting = f"{state.user_name}님, " if state.user_name else ""
+    return f"{greeting}{a} - {b} = {result}"
+
+
+@mcp.tool()
+def multiply(a: float, b: float) -> str:
+    """Multiply two numbers"""
+    result = memo.compute("multiply", (a, b), operator.mul)
+    state.calc.record("multiply", (a, b), result)
+
+    greeting = f"{state.user_name}님, " if state.user_name else ""
+    return f"{greeting}{a} × {b} = {result}"
+
+
+@mcp.tool()
+def divide(a: float, b: float) -> str:
+    """Divide a by b"""
+    if b == 0:
+        return "❌ 0으로 나눌 수 없습니다!"
+
+    result = memo.compute("divide", (a, b), operator.truediv)
+    state.calc.record("divide", (a, b), result)
+
+    greeting = f"{state.user_name}님, " if state.user_name else ""
+    return f"{greeting}{a} ÷ {b} = {result}"
+
+
+def _normalized(fn, numbers: list[float]) -> tuple[tuple[float, ...], float]:
+    row = tuple(map(float, numbers))
+    return row, fn(row)
+
+
+async def _aggregate(operation: str, fn, numbers: list[float], symbol: str) -> str:
+    if not numbers:
+        return "❌ 숫자 목록이 비어 있습니다!"
+
+    size = len(numbers)
+    # 캐시에 있어도 기록은 남김 (undo/통계가 호출 횟수와 일치하도록)
+    if size < OFFLOAD_THRESHOLD and size <= memo.max_values:
+        # key와 계산 모두 float로 정규화한 값을 사용
+        row = tuple(map(float, numbers))
+        key = memo.key(operation, row)
+        result = memo.get(key)
+        if result is None:
+            result = fn(row)
+            memo.put(key, result)
+    else:
+        # 큰 목록은 캐시하지 않음: key 정렬/해시와 정규화까지 모두 워커에서 한 번에
+        try:
+            row, result = await pool.run(_normalized, fn, numbers)
+        except PoolBusyError:
+            return BUSY_MESSAGE
+    state.calc.record(operation, row, result)
+
+    greeting = f"{state.user_name}님, " if state.user_name else ""
+    return f"{greeting}{symbol}({size}개) = {result}"
+
+
+@mcp.tool()
+async def calculate_sum(numbers: list[float]) -> str:
+    """Sum of a list of numbers"""
+    return await _aggregate("calculate_sum", math.fsum, numbers, "합계")
+
+
+@mcp.tool()
+async def calculate_average(numbers: list[float]) -> str:
+    """Average of a list of numbers"""
+    return await _aggregate("calculate_average", _average, numbers, "평균")
+
+
+@mcp.tool()
+async def find_max(numbers: list[float]) -> str:
+    """Maximum value of a list of numbers"""
+    return await _aggregate("find_max", max, numbers, "최댓값")
+
+
+@mcp.tool()
+async def find_min(numbers: list[float]) -> str:
+    """Minimum value of a list of numbers"""
+    return await _aggregate("find_min", min, numbers, "최솟값")
+
+
+# ---------------------------------------------------------------------------
+# 퍼센트 / 비교 (스칼라 또는 배열, 한 번의 element-wise 계산)
+# ---------------------------------------------------------------------------
+
+Numbers = float | list[float]
+
+
+def _percentage(value: float, percent: float) -> float:
+    return value * percent / 100
+
+
+def _increase_by_percent(value: float, percent: float) -> float:
+    return value + value * percent / 100
+
+
+def _decrease_by_percent(value: float, percent: float) -> float:
+    return value - value * percent / 100
+
+
+def _compare(a: float, b: float) -> float:
+    return float((a > b) - (a < b))
+
+
+def _pairwise(fn, xs: list[float], ys: list[float]) -> list[float]:
+    return list(map(fn, xs, ys))
+
+
+def _percent_report(
+    rows: list[tuple[float, float, float]], fmt: str
+) -> tuple[tuple[float, ...], float, list[str]]:
+    """기록할 한 행 (v1, p1, v2, p2, ...), 결과 합계, 출력 줄 (큰 배열은 워커에서 한 번에)"""
+    values = tuple(chain.from_iterable((v, p) for v, p, _ in rows))
+    total = math.fsum(result for _, _, result in rows)
+    return values, total, [fmt.format(v=v, p=p, r=result) for v, p, result in rows]
+
+
+def _broadcast(a: Numbers, b: Numbers) -> tuple[list[float], list[float]]:
+    """스칼라는 상대 배열 길이만큼 반복, 배열끼리는 길이가 같아야 함 (다르면 ValueError)"""
+    xs = a if isinstance(a, list) else None
+    ys = b if isinstance(b, list) else None
+    if xs is None and ys is None:
+        return [a], [b]
+    if xs is None:
+        xs = [a] * len(ys)
+    elif ys is None:
+        ys = [b] * len(xs)
+    elif len(xs) != len(ys):
+        raise ValueError(f"{len(xs)} != {len(ys)}")
+    return xs, ys
+
+
+async def _elementwise(
+    operation: str, fn, a: Numbers, b: Numbers
+) -> list[tuple[float, float, float]]:
+    """(a, b, 결과) 목록. 스칼라 호출은 캐시를, 큰 배열은 워커 풀을 사용"""
+    xs, ys = _broadcast(a, b)
+    if not isinstance(a, list) and not isinstance(b, list):
+        results = [memo.compute(operation, (a, b), fn)]
+    else:
+        results = await run_heavy(_pairwise, fn, xs, ys, size=len(xs))
+    return list(zip(xs, ys, results))
+
+
+async def _percent_tool(operation: str, fn, value: Numbers, percent: Numbers, fmt: str) -> str:
+    try:
+        rows = await _elementwise(operation, fn, value, percent)
+    except ValueError:
+        return "❌ value와 percent 목록의 길이가 같아야 합니다!"
+    except PoolBusyError:
+        return BUSY_MESSAGE
+    if not rows:
+        return "❌ 숫자 목록이 비어 있습니다!"
+
+    # 배열 호출도 _aggregate처럼 기록 한 행, undo 한 번 (결과는 합계로 total에 더함)
+    try:
+        row, total, lines = await run_heavy(_percent_report, rows, fmt, size=len(rows))
+    except PoolBusyError:
+        return BUSY_MESSAGE
+    state.calc.record(operation, row, total)
+
+    greeting = f"{state.user_name}님, " if state.user_name else ""
+    if len(lines) == 1:
+        return f"{greeting}{lines[0]}"
+    return "\n".join([f"{greeting}{len(lines)}개 계산:", *(f"- {line}" for line in lines)])
+
+
+@mcp.tool()
+async def percentage(value: Numbers, percent: Numbers) -> str:
+    """percent% of value. value/percent: a number or a list (element-wise)"""
+    return await _percent_tool("percentage", _percentage, value, percent, "{v}의 {p}% = {r}")
+
+
+@mcp.tool()
+async def increase_by_percent(value: Numbers, percent: Numbers) -> str:
+    """Increase value by percent%. value/percent: a number or a list (element-wise)"""
+    return await _percent_tool(
+        "increase_by_percent", _increase_by_percent, value, percent, "{v} + {p}% = {r}"
+    )
+
+
+@mcp.tool()
+async def decrease_by_percent(value: Numbers, percent: Numbers) -> str:
+    """Decrease value by percent%. value/percent: a number or a list (element-wise)"""
+    return await _percent_tool(
+        "decrease_by_percent", _decrease_by_percent, value, percent, "{v} - {p}% = {r}"
+    )
+
+
+async def _compare_tool(a: Numbers, b: Numbers, fmt) -> str:
+    # 비교는 값을 만들지 않으므로 기록/합계에 남기지 않음
+    try:
+        rows = await _elementwise("compare", _compare, a, b)
+    except ValueError:
+        return "❌ 비교할 두 목록의 길이가 같아야 합니다!"
+    except PoolBusyError:
+        return BUSY_MESSAGE
+    if not rows:
+        return "❌ 숫자 목록이 비어 있습니다!"
+
+    lines = [fmt(x, y, int(sign)) for x, y, sign in rows]
+    if len(lines) == 1:
+        return lines[0]
+    return "\n".join([f"{len(lines)}개 비교:", *(f"- {line}" for line in lines)])
+
+
+_SIGNS = {1: ">", 0: "=", -1: "<"}
+
+
+@mcp.tool()
+async def compare_numbers(a: Numbers, b: Numbers) -> str:
+    """Compare a with b (>, =, <). a/b: a number or a list (element-wise)"""
+    return await _compare_tool(a, b, lambda x, y, sign: f"{x} {_SIGNS[sign]} {y} (차이 {x - y})")
+
+
+@mcp.tool()
+async def is_greater_than(value: Numbers, threshold: Numbers) -> str:
+    """Whether value > threshold. value/threshold: a number or a list (element-wise)"""
+    return await _compare_tool(
+        value, threshold, lambda x, y, sign: f"{x} > {y}: {'참' if sign > 0 else '거짓'}"
+    )
+
+
+@mcp.tool()
+async def is_less_than(value: Numbers, threshold: Numbers) -> str:
+    """Whether value < threshold. value/threshold: a number or a list (element-wise)"""
+    return await _compare_tool(
+        value, threshold, lambda x, y, sign: f"{x} < {y}: {'참' if sign < 0 else '거짓'}"
+    )
+
+
+def _unknown_calculator(name: str) -> str:
+    return f"❌ '{name}' 계산기가 없습니다. create_calculator로 먼저 만들어주세요."
+
+
+@mcp.tool()
+async def get_history(calculator: Optional[str] = None) -> str:
+    """Get calculation history (of the current calculator, or the named one)"""
+    try:
+        calc = state.calculators.get(calculator)
+    except KeyError:
+        return _unknown_calculator(calculator)
+
+    if not calc.history:
+        return "계산 기록이 없습니다."
+
+    if state.user_name:
+        header = f"📊 {state.user_name}님의 계산 기록:\n"
+    else:
+        header = "📊 계산 기록:\n"
+
+    # 워커에서 포맷하는 동안만 고정 (끝나면 풀어서 이후 undo가 열을 복사하지 않게)
+    view = calc.history.view(pin=True)
+    try:
+        return await run_heavy(_format_history, header, view, size=len(view))
+    except PoolBusyError:
+        return BUSY_MESSAGE
+    finally:
+        view.release()
+
+
+@mcp.tool()
+def get_total(calculator: Optional[str] = None) -> str:
+    """Get total sum of all calculation results (of the current calculator, or the named one)"""
+    try:
+        calc = state.calculators.get(calculator)
+    except KeyError:
+        return _unknown_calculator(calculator)
+
+    greeting = f"{state.user_name}님, " if state.user_name else ""
+    return f"{greeting}모든 계산 결과의 합: {calc.total}"
+
+
+@mcp.tool()
+def get_stats(calculator: Optional[str] = None) -> str:
+    """Get calculator statistics (of the current calculator, or the named one)"""
+    try:
+        calc = state.calculators.get(calculator)
+    except KeyError:
+        return _unknown_calculator(calculator)
+
+    if not calc.history.count:
+        return "통계 데이터가 없습니다."
+
+    result = []
+    if state.user_name:
+        result.append(f"📈 {state.user_name}님의 통계:")
+    else:
+        result.append("📈 계산기 통계:")
+
+    result.append(f"- 총 계산 횟수: {calc.history.count}")
+    if calc.history.folded.count:
+        result.append(f"  (그중 {calc.history.folded.count}개는 압축되어 통계로만 보관)")
+    result.append(f"- 누적 합계: {calc.total}")
+    result.append("- 연산별 사용 횟수:")
+    for op, count in calc.history.op_counts.items():
+        result.append(f"  • {op}: {count}회")
+
+    return "\n".join(result)
+
+
+@mcp.tool()
+def get_cache_stats() -> str:
+    """Get memoization cache statistics (hit rate, evictions, size)"""
+    return "\n".join(
+        [
+            "🧠 계산 캐시:",
+            f"- 적중률: {memo.hit_rate:.1%} (적중 {memo.hits}회 / 미적중 {memo.misses}회)",
+            f"- 축출: {memo.evictions}회",
+            f"- 항목: {len(memo)}/{memo.max_entries}개 (숫자 {memo.values}/{memo.max_values}개)",
+        ]
+    )
+
+
+def _parse_time(value) -> float:
+    """unix 초(숫자) 또는 ISO 8601 문자열 → unix 초 (시간대가 없으면 서버 로컬 시간)"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+@mcp.tool()
+def query_stats(
+    since: str | float | None = None,
+    until: str | float | None = None,
+    op: Optional[str] = None,
+    calculator: Optional[str] = None,
+) -> str:
+    """Count/sum/average of results in a time range [since, until), optionally for one operation.
+
+    since/until: ISO 8601 datetime (e.g. 2025-01-01T09:00) or unix seconds; default is all time.
+    """
+    try:
+        calc = state.calculators.get(calculator)
+    except KeyError:
+        return _unknown_calculator(calculator)
+    try:
+        start = _parse_time(since) if since is not None else -math.inf
+        stop = _parse_time(until) if until is not None else math.inf
+    except ValueError:
+        return "❌ 시간 형식이 올바르지 않습니다. ISO 8601(2025-01-01T09:00) 또는 unix 초로 입력해주세요."
+
+    count, total = calc.history.query(start, stop, op)
+    scope = f"'{op}' 연산" if op else "전체 연산"
+    if not count:
+        return f"해당 기간에 {scope} 기록이 없습니다."
+    return f"📅 {scope}: {count}회, 결과 합계 {total}, 평균 {total / count}"
+
+
+@mcp.tool()
+def create_calculator(name: str) -> str:
+    """Create a new named calculator (workspace) with its own history and total"""
+    try:
+        state.calculators.create(name)
+    except KeyError:
+        return f"⚠️ '{name}' 계산기가 이미 있습니다."
+    return f"🆕 '{name}' 계산기를 만들었습니다. switch_calculator로 전환할 수 있습니다."
+
+
+@mcp.tool()
+def switch_calculator(name: str) -> str:
+    """Switch the current calculator; calculations and history apply to it afterwards"""
+    if name not in state.calculators:
+        return _unknown_calculator(name)
+    state.calculators.active = name
+    calc = state.calc
+    return f"🔀 '{name}' 계산기로 전환했습니다. (기록 {calc.history.count}개, 합계 {calc.total})"
+
+
+@mcp.tool()
+def list_calculators() -> str:
+    """List named calculators"""
+    registry = state.calculators
+    result = ["🧮 계산기 목록:"]
+    for name in registry.names():
+        marker = "▶" if name == registry.active else "-"
+        calc = registry.peek(name)
+        if calc is not None:
+            result.append(f"{marker} {name}: 기록 {calc.history.count}개, 합계 {calc.total}")
+        else:
+            # 디스크로 내려간 계산기는 목록 조회만으로 다시 불러오지 않음
+            result.append(f"{marker} {name}: (디스크에 보관됨)")
+    return "\n".join(result)
+
+
+@mcp.tool()
+def reset_calculator() -> str:
+    """Reset calculator (clear history and total, keep user name)"""
+    state.calc.reset()
+    greeting = f"{state.user_name}님, " if state.user_name else ""
+    return f"{greeting}계산기가 초기화되었습니다."
+
+
+@mcp.tool()
+def reset_all() -> str:
+    """Reset everything: user name, every calculator's history, total and snapshots"""
+    old_name = state.user_name
+    state.user_name = None
+    state.calculators.reset_all()
+
+    if old_name:
+        return f"안녕히 가세요, {old_name}님! 모든 데이터가 초기화되었습니다."
+    else:
+        return "모든 데이터가 초기화되었습니다."
+
+
+@mcp.tool()
+def undo() -> str:
+    """Undo the last calculation or reset"""
+    undone = state.calc.undo()
+    if undone is None:
+        return "되돌릴 작업이 없습니다."
+    return f"↩️ {undone} 작업을 되돌렸습니다. 현재 합계: {state.calc.total}"
+
+
+@mcp.tool()
+def redo() -> str:
+    """Redo the last undone calculation or reset"""
+    redone = state.calc.redo()
+    if redone is None:
+        return "다시 실행할 작업이 없습니다."
+    return f"↪️ {redone} 작업을 다시 실행했습니다. 현재 합계: {state.calc.total}"
+
+
+@mcp.tool()
+def save_snapshot(name: str) -> str:
+    """Save a named point-in-time snapshot of history and total"""
+    state.calc.save_snapshot(name)
+    return f"📸 '{name}' 스냅샷을 저장했습니다. (기록 {state.calc.history.count}개, 합계 {state.calc.total})"
+
+
+@mcp.tool()
+def restore_snapshot(name: str) -> str:
+    """Restore history and total from a named snapshot (undoable)"""
+    if not state.calc.restore_snapshot(name):
+        return f"❌ '{name}' 스냅샷이 없습니다."
+    return f"📸 '{name}' 스냅샷으로 복원했습니다. (기록 {state.calc.history.count}개, 합계 {state.calc.total})"
+
+
+@mcp.tool()
+def list_snapshots() -> str:
+    """List saved snapshots"""
+    if not state.calc.snapshots:
+        return "저장된 스냅샷이 없습니다."
+    result = ["📸 스냅샷 목록:"]
+    for name, (view, total) in state.calc.snapshots.items():
+        result.append(f"- {name}: 기록 {view.folded_count + len(view)}개, 합계 {total}")
+    return "\n".join(result)
+
+
+
+# ---------------------------------------------------------------------------
+# 기록 내보내기 (MCP resource / HTTP 스트리밍)
+# ---------------------------------------------------------------------------
+
+HISTORY_CHUNK_ROWS = int(os.getenv("CALC_HISTORY_CHUNK_ROWS", "1000"))
+CSV_HEADER = "index,operation,values,result,timestamp\n"
+
+
+def iter_history_csv(
+    view: HistoryView, start: int = 0, stop: Optional[int] = None, header: bool = True
+) -> Iterator[str]:
+    """Yield CSV text in chunks of HISTORY_CHUNK_ROWS rows"""
+    if header:
+        yield CSV_HEADER
+    buf = []
+    # index는 압축으로 합쳐진 행까지 센 전체 순번
+    for i, (op, vals, res, ts) in enumerate(view.rows(start, stop), view.folded_count + start + 1):
+        buf.append(f'{i},{op},"{" ".join(map(str, vals))}",{res},{ts}\n')
+        if len(buf) >= HISTORY_CHUNK_ROWS:
+            yield "".join(buf)
+            buf.clear()
+    if buf:
+        yield "".join(buf)
+
+
+def iter_history_json(
+    view: HistoryView, start: int = 0, stop: Optional[int] = None
+) -> Iterator[str]:
+    """Yield a JSON array of history records in chunks"""
+    yield "["
+    buf = []
+    for i, (op, vals, res, ts) in enumerate(view.rows(start, stop), start):
+        record = {"operation": op, "values": list(vals), "result": res, "timestamp": ts}
+        buf.append(("," if i > start else "") + json.dumps(record, ensure_ascii=False))
+        if len(buf) >= HISTORY_CHUNK_ROWS:
+            yield "".join(buf)
+            buf.clear()
+    buf.append("]")
+    yield "".join(buf)
+
+
+def _calculator(session: str) -> CalculatorState:
+    # URI의 {session}은 계산기 이름 (기본 계산기는 "default")
+    try:
+        return state.calculators.get(session)
+    except KeyError:
+        raise ResourceError(f"Unknown calculator: {session}") from None
+
+
+def _history_view(session: str) -> HistoryView:
+    return _calculator(session).history.view()
+
+
+def _page_bounds(page: str) -> tuple[int, int]:
+    if not page.isdigit():
+        raise ResourceError(f"Invalid page: {page}")
+    start = int(page) * HISTORY_CHUNK_ROWS
+    return start, start + HISTORY_CHUNK_ROWS
+
+
+@mcp.resource("history://{session}", mime_type="application/json")
+def history_json(session: str) -> str:
+    """Calculation history as a JSON array"""
+    return "".join(iter_history_json(_history_view(session)))
+
+
+@mcp.resource("history://{session}/csv", mime_type="text/csv")
+def history_csv(session: str) -> str:
+    """Calculation history as CSV"""
+    return "".join(iter_history_csv(_history_view(session)))
+
+
+@mcp.resource("history://{session}/csv/{page}", mime_type="text/csv")
+def history_csv_page(session: str, page: str) -> str:
+    """One HISTORY_CHUNK_ROWS-row page of the CSV history (bounded size per read)"""
+    start, stop = _page_bounds(page)
+    return "".join(iter_history_csv(_history_view(session), start, stop))
+
+
+@mcp.custom_route("/history/{session}/csv", methods=["GET"])
+async def history_csv_stream(request: Request) -> Response:
+    """Bulk CSV export streamed chunk by chunk (SSE/HTTP 서버에서만 사용 가능)"""
+    session = request.path_params["session"]
+    try:
+        # 스트리밍하는 동안 undo/compact가 일어나도 안전하도록 고정하고, 끝나면 해제
+        view = _calculator(session).history.view(pin=True)
+    except ResourceError as e:
+        return PlainTextResponse(str(e), status_code=404)
+    return StreamingResponse(_released(view, iter_history_csv(view)), media_type="text/csv")
+
+
+def _released(view: HistoryView, chunks: Iterator[str]) -> Iterator[str]:
+    try:
+        yield from chunks
+    finally:
+        view.release()
+
+
+@mcp.resource("total://{session}", mime_type="text/plain")
+def total_resource(session: str) -> str:
+    """Current running total"""
+    return str(_calculator(session).total)
+
+
+# ---------------------------------------------------------------------------
+# 상태 변경 알림 (resource updated 알림 / SSE 이벤트 스트림)
+# ---------------------------------------------------------------------------
+
+
+class ChangeFeed:
+    """Fans calculator change events out to MCP subscribers and SSE listeners"""
+
+    QUEUE_SIZE = 1000
+    WATCHED_URIS = ("history://{}", "history://{}/csv", "total://{}")
+
+    def __init__(self):
+        self.subscribers: dict[str, set] = {}
+        self.queues: set[asyncio.Queue] = set()
+        self._dirty: set[str] = set()
+
+    def subscribe(self, uri: str, session):
+        self.subscribers.setdefault(uri, set()).add(session)
+
+    def unsubscribe(self, uri: str, session):
+        self.subscribers.get(uri, set()).discard(session)
+
+    def publish(self, event: dict):
+        for queue in self.queues:
+            if queue.full():
+                # 느린 구독자는 오래된 이벤트부터 버림 (서버가 기다리지 않음)
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+        # 같은 틱에 여러 번 바뀌어도 resource 알림은 URI당 한 번만 전송
+        if any(self.subscribers.values()):
+            if not self._dirty:
+                asyncio.get_running_loop().call_soon(self._flush)
+            self._dirty.add(event.get("calculator", "default"))
+
+    def _flush(self):
+        dirty, self._dirty = self._dirty, set()
+        for name in dirty:
+            for template in self.WATCHED_URIS:
+                uri = template.format(name)
+                for session in list(self.subscribers.get(uri, ())):
+                    asyncio.create_task(self._notify(uri, session))
+
+    async def _notify(self, uri: str, session):
+        try:
+            await session.send_resource_updated(AnyUrl(uri))
+        except Exception:
+            # 연결이 끊긴 세션은 구독 목록에서 제거
+            self.unsubscribe(uri, session)
+
+    async def stream(self) -> AsyncIterator[str]:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.QUEUE_SIZE)
+        self.queues.add(queue)
+        try:
+            yield ": connected\n\n"
+            while True:
+                event = await queue.get()
+                yield f"event: {event['event']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+        finally:
+            self.queues.discard(queue)
+
+
+feed = ChangeFeed()
+state.calculators.listeners.append(feed.publish)
+
+
+# ---------------------------------------------------------------------------
+# 기록 보존 정책 / 백그라운드 압축
+# ---------------------------------------------------------------------------
+
+
+class RetentionPolicy:
+    """How many raw history rows to keep (행 수 / 경과 시간 / 추정 바이트, 0이면 제한 없음)"""
+
+    def __init__(self, max_rows: int = 0, max_age: float = 0, max_bytes: int = 0):
+        self.max_rows = max_rows
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def from_env(cls) -> "RetentionPolicy":
+        return cls(
+            max_rows=int(os.getenv("CALC_RETAIN_ROWS", "0")),
+            max_age=float(os.getenv("CALC_RETAIN_SECONDS", "0")),
+            max_bytes=int(os.getenv("CALC_RETAIN_BYTES", "0")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.max_rows or self.max_age or self.max_bytes)
+
+    def excess(self, history: HistoryLog, now: float) -> int:
+        """압축해야 할 가장 오래된 행 수"""
+        # undo가 항상 실제 행을 되돌릴 수 있도록 최근 UNDO_DEPTH개는 남김
+        limit = len(history) - CalculatorState.UNDO_DEPTH
+        if limit <= 0:
+            return 0
+        n = 0
+        if self.max_rows:
+            n = max(n, len(history) - self.max_rows)
+        if self.max_age:
+            n = max(n, history.rows_before(now - self.max_age))
+        if self.max_bytes and history.nbytes > self.max_bytes:
+            # 평균 행 크기로 어림잡고, 다음 단계에서 남은 초과분을 다시 계산
+            n = max(n, math.ceil((history.nbytes - self.max_bytes) * len(history) / history.nbytes))
+        return min(n, limit)
+
+
+class HistoryCompactor:
+    """Folds old rows into rollups on the event loop, a small slice per tick.
+
+    계산 기록(record) 이벤트가 오면 작업을 예약하고, 한 번에 COMPACT_SLICE행씩만 합친 뒤
+    다음 틱으로 넘겨서 도구 호출 사이의 지연이 한꺼번에 튀지 않게 한다.
+    """
+
+    def __init__(self, registry: CalculatorRegistry, policy: RetentionPolicy, slice_rows: int):
+        self.registry = registry
+        self.policy = policy
+        self.slice_rows = max(1, slice_rows)
+        self.folded_rows = 0
+        self._pending = False
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def on_change(self, event: dict):
+        if event["event"] == "record":
+            self.schedule()
+
+    def schedule(self):
+        if self._pending or not self.policy.enabled:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # 이벤트 루프 밖(임베디드 동기 호출 등)에서는 다음 기회에 처리
+            return
+        self._pending = True
+        loop.call_soon(self._step)
+
+    def _step(self):
+        self._pending = False
+        budget = self.slice_rows
+        now = time.time()
+        for name, calc in self.registry.loaded():
+            n = min(self.policy.excess(calc.history, now), budget)
+            if n <= 0:
+                continue
+            folded = calc.history.compact(n)
+            self.folded_rows += folded
+            budget -= folded
+            calc._changed("compact", folded=folded)
+            if not budget:
+                # 남은 작업은 다음 틱에 (다른 요청이 먼저 실행될 수 있게)
+                self.schedule()
+                return
+        if self.policy.max_age:
+            # 새 계산이 없어도 기록은 오래되므로 주기적으로 다시 확인
+            self._arm_timer()
+
+    def _arm_timer(self):
+        if self._timer is not None and not self._timer.cancelled():
+            self._timer.cancel()
+        delay = max(1.0, self.policy.max_age / 10)
+        self._timer = asyncio.get_running_loop().call_later(delay, self.schedule)
+
+
+COMPACT_SLICE = int(os.getenv("CALC_COMPACT_SLICE", "500"))
+
+compactor = HistoryCompactor(state.calculators, RetentionPolicy.from_env(), COMPACT_SLICE)
+state.calculators.listeners.append(compactor.on_change)
+
+
+@mcp._mcp_server.subscribe_resource()
+async def _subscribe_resource(uri: AnyUrl):
+    feed.subscribe(str(uri), mcp._mcp_server.request_context.session)
+
+
+@mcp._mcp_server.unsubscribe_resource()
+async def _unsubscribe_resource(uri: AnyUrl):
+    feed.unsubscribe(str(uri), mcp._mcp_server.request_context.session)
+
+
+_base_capabilities = mcp._mcp_server.get_capabilities
+
+
+def _get_capabilities(notification_options, experimental_capabilities):
+    # lowlevel 서버는 구독 핸들러가 있어도 initialize 응답에 subscribe=False를 보내므로
+    # 직접 켜 줌 (그래야 스펙을 따르는 클라이언트가 resources/subscribe를 보냄)
+    capabilities = _base_capabilities(notification_options, experimental_capabilities)
+    if capabilities.resources is not None:
+        capabilities.resources.subscribe = True
+    return capabilities
+
+
+mcp._mcp_server.get_capabilities = _get_capabilities
+
+
+@mcp.custom_route("/events", methods=["GET"])
+async def event_stream(request: Request) -> Response:
+    """Server-Sent Events stream of calculator operations (SSE/HTTP 서버에서만 사용 가능)"""
+    return StreamingResponse(
+        feed.stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+# ---------------------------------------------------------------------------
+# 운영용 프로파일링 (localhost 또는 CALC_ADMIN_TOKEN 보유자만)
+# ---------------------------------------------------------------------------
+
+ADMIN_TOKEN = os.getenv("CALC_ADMIN_TOKEN", "")
+LOCAL_HOSTS = {"127.0.0.1", "::1", "localhost"}
+
+profiler = ProfileSession()
+
+
+def _admin_allowed(request: Request) -> bool:
+    if request.client is not None and request.client.host in LOCAL_HOSTS:
+        return True
+    if ADMIN_TOKEN:
+        supplied = request.headers.get("authorization", "").removeprefix("Bearer ")
+        return hmac.compare_digest(supplied, ADMIN_TOKEN)
+    return False
+
+
+def _profile_params(request: Request) -> tuple[float, int, bool, bool]:
+    query = request.query_params
+    seconds = float(query.get("seconds", "10"))
+    top = int(query.get("top", "20"))
+    cpu = query.get("cpu", "1") != "0"
+    memory = query.get("memory", "1") != "0"
+    return seconds, top, cpu, memory
+
+
+@mcp.custom_route("/admin/profile", methods=["GET"])
+async def profile_window(request: Request) -> Response:
+    """Profile the server for ?seconds=N and return top-N hot functions/allocation sites"""
+    if not _admin_allowed(request):
+        return PlainTextResponse("forbidden", status_code=403)
+    try:
+        seconds, top, cpu, memory = _profile_params(request)
+        seconds = profiler.start(seconds, cpu=cpu, memory=memory)
+    except ValueError:
+        return PlainTextResponse("invalid parameters", status_code=400)
+    except RuntimeError as e:
+        return PlainTextResponse(str(e), status_code=409)
+    # 기다리는 동안에도 이벤트 루프는 다른 요청을 계속 처리 (그 모습이 샘플링됨)
+    await asyncio.sleep(seconds)
+    return PlainTextResponse(profiler.stop().format(top))
+
+
+@mcp.custom_route("/admin/profile/start", methods=["POST"])
+async def profile_start(request: Request) -> Response:
+    """Start a profile window (stops itself after ?seconds=N, at most CALC_PROFILE_MAX_SECONDS)"""
+    if not _admin_allowed(request):
+        return PlainTextResponse("forbidden", status_code=403)
+    try:
+        seconds, _, cpu, memory = _profile_params(request)
+        seconds = profiler.start(seconds, cpu=cpu, memory=memory)
+    except ValueError:
+        return PlainTextResponse("invalid parameters", status_code=400)
+    except RuntimeError as e:
+        return PlainTextResponse(str(e), status_code=409)
+    logger.info(f"Profiling started for {seconds:.1f}s")
+    return PlainTextResponse(f"profiling for {seconds:.1f}s")
+
+
+@mcp.custom_route("/admin/profile/stop", methods=["POST"])
+async def profile_stop(request: Request) -> Response:
+    """Stop the running profile (or fetch the last one) and return the report"""
+    if not _admin_allowed(request):
+        return PlainTextResponse("forbidden", status_code=403)
+    try:
+        _, top, _, _ = _profile_params(request)
+    except ValueError:
+        return PlainTextResponse("invalid parameters", status_code=400)
+    report = profiler.stop()
+    if report is None:
+        return PlainTextResponse("no profile", status_code=404)
+    return PlainTextResponse(report.format(top))
+
+
+SERVER_TRANSPORTS = ("stdio", "sse", "http")
+
+
+def main(argv: Optional[list[str]] = None):
+    env_transport = os.getenv("MCP_TRANSPORT", "stdio")
+    parser = argparse.ArgumentParser(description="Personal Calculator MCP Server")
+    parser.add_argument(
+        "--transport",
+        choices=SERVER_TRANSPORTS,
+        # memory는 클라이언트 쪽에서 서버를 직접 띄우는 방식이므로 단독 실행 시 stdio
+        default=env_transport if env_transport in SERVER_TRANSPORTS else "stdio",
+    )
+    parser.add_argument("--host", default=os.getenv("CALC_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("CALC_PORT", "8234")))
+    parser.add_argument(
+        "--warm",
+        action="store_true",
+        help="클라이언트가 CALC_WARM_URL로 붙는 상주 서버 (127.0.0.1:CALC_WARM_PORT, SSE)",
+    )
+    args = parser.parse_args(argv)
+
+    logger.info(f"Personal Calculator MCP Server starting... (import {IMPORT_SECONDS:.2f}s)")
+    if args.warm:
+        # 프로세스 기동/임포트 비용을 한 번만 지불
+        mcp.run(transport="sse", host="127.0.0.1", port=int(os.getenv("CALC_WARM_PORT", "8235")))
+    elif args.transport == "stdio":
+        mcp.run(transport="stdio")
+    else:
+        mcp.run(transport=args.transport, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
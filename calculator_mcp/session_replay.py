@@ -0,0 +1,175 @@
+# session_replay.py
+"""Record/replay of agent sessions.
+
+녹화 모드에서는 모델 응답과 MCP 도구 결과를 gzip JSON Lines 파일로 저장하고,
+재생 모드에서는 실제 LLM 대신 저장된 응답을 순서대로 돌려주는 모델로 같은 시나리오를
+새 서버에 다시 실행한다. 모델 호출 없이 최대 속도로 돌기 때문에 클라이언트/서버
+오버헤드만 따로 측정하고, 도구 결과가 달라지면 회귀로 보고할 수 있다.
+"""
+import gzip
+import json
+import time
+from typing import Any, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.messages.tool import tool_call_chunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+FORMAT_VERSION = 1
+
+
+def tool_output_text(output: Any) -> str:
+    """ToolMessage / MCP content 리스트 / 문자열을 사람이 읽는 텍스트로 변환"""
+    if hasattr(output, "content"):
+        output = output.content
+    if isinstance(output, list):
+        return "\n".join(
+            part.get("text", str(part)) if isinstance(part, dict) else str(part)
+            for part in output
+        )
+    return str(output)
+
+
+class SessionRecorder(BaseCallbackHandler):
+    """Callback handler capturing model responses and tool results in order"""
+
+    # 이벤트 순서가 섞이지 않도록 executor가 아닌 호출 지점에서 바로 실행
+    run_inline = True
+
+    def __init__(self):
+        self.events: list[dict] = []
+        self._started: dict[Any, float] = {}
+        self._tool_inputs: dict[Any, tuple[str, Any]] = {}
+
+    @property
+    def models(self) -> list[dict]:
+        return [e for e in self.events if e["kind"] == "model"]
+
+    @property
+    def tools(self) -> list[dict]:
+        return [e for e in self.events if e["kind"] == "tool"]
+
+    def mark_question(self, message: str):
+        self.events.append({"kind": "question", "message": message})
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        message = response.generations[0][0].message
+        self.events.append(
+            {
+                "kind": "model",
+                "content": message.content,
+                "tool_calls": [
+                    {"name": tc["name"], "args": tc["args"], "id": tc["id"]}
+                    for tc in getattr(message, "tool_calls", None) or []
+                ],
+                "ms": self._elapsed_ms(run_id),
+            }
+        )
+
+    def on_tool_start(self, serialized, input_str, *, run_id, inputs=None, **kwargs):
+        self._started[run_id] = time.perf_counter()
+        self._tool_inputs[run_id] = (serialized.get("name"), inputs)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        name, args = self._tool_inputs.pop(run_id, (None, None))
+        self.events.append(
+            {
+                "kind": "tool",
+                "name": name,
+                "args": args,
+                "output": tool_output_text(output),
+                "ms": self._elapsed_ms(run_id),
+            }
+        )
+
+    def _elapsed_ms(self, run_id) -> Optional[float]:
+        started = self._started.pop(run_id, None)
+        if started is None:
+            return None
+        return round((time.perf_counter() - started) * 1000, 2)
+
+    def save(self, path: str, model_name: str = ""):
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            header = {"kind": "header", "version": FORMAT_VERSION, "model": model_name}
+            f.write(json.dumps(header, ensure_ascii=False) + "\n")
+            for event in self.events:
+                f.write(json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+
+def load_recording(path: str) -> list[dict]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        events = [json.loads(line) for line in f if line.strip()]
+    header = events.pop(0) if events and events[0]["kind"] == "header" else {}
+    if header.get("version", FORMAT_VERSION) != FORMAT_VERSION:
+        raise ValueError(f"Unsupported recording version: {header.get('version')}")
+    return events
+
+
+class ReplayChatModel(BaseChatModel):
+    """Chat model that returns recorded responses in order (LLM 호출 없음)"""
+
+    responses: list[dict]
+    cursor: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    def bind_tools(self, tools, **kwargs):
+        # 녹화된 응답에 이미 tool call이 들어 있으므로 바인딩할 것이 없음
+        return self
+
+    def _next_message(self) -> AIMessage:
+        if self.cursor >= len(self.responses):
+            raise RuntimeError("녹화된 모델 응답을 모두 사용했습니다 (시나리오가 달라졌을 수 있음)")
+        response = self.responses[self.cursor]
+        self.cursor += 1
+        return AIMessage(content=response["content"], tool_calls=response["tool_calls"])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=self._next_message())])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        message = self._next_message()
+        chunk = AIMessageChunk(
+            content=message.content,
+            tool_call_chunks=[
+                tool_call_chunk(
+                    name=tc["name"],
+                    args=json.dumps(tc["args"], ensure_ascii=False),
+                    id=tc["id"],
+                    index=i,
+                )
+                for i, tc in enumerate(message.tool_calls)
+            ],
+        )
+        yield ChatGenerationChunk(message=chunk)
+
+
+def compare_tools(recorded: list[dict], replayed: list[dict]) -> list[str]:
+    """Return human-readable differences between recorded and replayed tool results"""
+    diffs = []
+    for i, (old, new) in enumerate(zip(recorded, replayed), 1):
+        if (old["name"], old["output"]) != (new["name"], new["output"]):
+            diffs.append(
+                f"#{i} {old['name']}: {old['output']!r} → {new['name']}: {new['output']!r}"
+            )
+    if len(recorded) != len(replayed):
+        diffs.append(f"도구 호출 수가 다름: 녹화 {len(recorded)}회, 재생 {len(replayed)}회")
+    return diffs
+
+
+def latency_summary(events: list[dict]) -> dict[str, float]:
+    model_ms = [e["ms"] for e in events if e["kind"] == "model" and e.get("ms")]
+    tool_ms = [e["ms"] for e in events if e["kind"] == "tool" and e.get("ms")]
+    return {
+        "model_calls": len(model_ms),
+        "model_ms": round(sum(model_ms), 2),
+        "tool_calls": len(tool_ms),
+        "tool_ms": round(sum(tool_ms), 2),
+    }
@@ -0,0 +1,61 @@
+# streaming.py
+"""Token/tool event stream for a LangGraph agent with TTFT measurement.
+
+`agent.ainvoke`는 답변이 끝까지 만들어질 때까지 아무것도 보여주지 않는다.
+`stream_answer`는 `astream_events`를 받아 토큰과 도구 이벤트를 바로 넘겨주고,
+마지막에 최종 답변과 첫 토큰까지의 시간(TTFT), 전체 지연을 알려준다.
+
+    async for event in stream_answer(agent, {"messages": "5 + 3"}):
+        event["kind"]  # "token" | "tool_start" | "tool_end" | "done"
+"""
+import time
+from contextlib import aclosing
+from typing import AsyncIterator, Optional
+
+from .session_replay import tool_output_text
+
+
+async def stream_answer(agent, inputs, config: Optional[dict] = None) -> AsyncIterator[dict]:
+    started = time.perf_counter()
+    ttft: Optional[float] = None
+    answer = ""
+
+    # 소비자가 중간에 멈춰도(break) 그래프 실행을 바로 정리
+    async with aclosing(agent.astream_events(inputs, config=config, version="v2")) as events:
+        async for event in events:
+            kind = event["event"]
+
+            if kind == "on_chat_model_start":
+                # 최종 답변은 마지막 모델 호출의 텍스트
+                answer = ""
+
+            elif kind == "on_chat_model_stream":
+                text = event["data"]["chunk"].content
+                if isinstance(text, str) and text:
+                    if ttft is None:
+                        ttft = time.perf_counter() - started
+                    answer += text
+                    yield {"kind": "token", "text": text}
+
+            elif kind == "on_chat_model_end":
+                # 스트리밍을 지원하지 않는 모델이면 완성된 메시지에서 답변을 가져옴
+                output = event["data"].get("output")
+                if not answer and isinstance(getattr(output, "content", None), str):
+                    answer = output.content
+
+            elif kind == "on_tool_start":
+                yield {"kind": "tool_start", "name": event["name"], "args": event["data"].get("input")}
+
+            elif kind == "on_tool_end":
+                yield {
+                    "kind": "tool_end",
+                    "name": event["name"],
+                    "output": tool_output_text(event["data"].get("output")),
+                }
+
+    yield {
+        "kind": "done",
+        "answer": answer,
+        "ttft": ttft,
+        "total": time.perf_counter() - started,
+    }
@@ -0,0 +1,112 @@
+# tool_budget.py
+"""Per-tool output token budget for MCP tools loaded with `load_mcp_tools`.
+
+`get_history`처럼 서버 상태에 비례해서 커지는 결과가 그대로 메시지 목록에 들어가면
+LLM prefill 시간과 비용이 계속 늘어난다. 예산을 넘는 결과는 앞/뒤 일부만 남기고
+(head/tail), 요약 도구가 지정된 경우 서버 쪽 요약 결과를 덧붙인다.
+"""
+import os
+from typing import Optional
+
+from langchain_core.tools import StructuredTool
+
+DEFAULT_BUDGET = int(os.getenv("TOOL_OUTPUT_TOKEN_BUDGET", "1000"))
+
+# 예산을 넘으면 함께 호출할 서버 쪽 요약 도구
+SUMMARY_TOOLS = {"get_history": "get_stats"}
+
+
+def estimate_tokens(text: str) -> int:
+    # 토크나이저 없이 쓰는 보수적인 근사치 (UTF-8 3바이트 ≈ 1토큰, 한글 1글자 ≈ 1토큰)
+    return len(text.encode("utf-8")) // 3 + 1
+
+
+def parse_budgets(spec: str) -> dict[str, int]:
+    """"get_history=2000,get_stats=300" → {"get_history": 2000, "get_stats": 300}"""
+    budgets = {}
+    for item in spec.split(","):
+        name, _, value = item.partition("=")
+        if name.strip() and value.strip():
+            budgets[name.strip()] = int(value)
+    return budgets
+
+
+def head_tail(text: str, budget: int) -> str:
+    """앞부분 2/3, 뒷부분 1/3을 줄 단위로 남기고 가운데를 생략"""
+    lines = text.splitlines()
+    head_budget = budget * 2 // 3
+    tail_budget = budget - head_budget
+
+    head, used = [], 0
+    for line in lines:
+        cost = estimate_tokens(line)
+        if used + cost > head_budget:
+            break
+        head.append(line)
+        used += cost
+
+    tail, used = [], 0
+    for line in reversed(lines[len(head) :]):
+        cost = estimate_tokens(line)
+        if used + cost > tail_budget:
+            break
+        tail.append(line)
+        used += cost
+    tail.reverse()
+
+    if not head:
+        # 첫 줄부터 너무 길어 줄 단위로 자를 수 없으면 글자 단위로 자름
+        return f"{text[:budget]}\n... (출력이 잘렸습니다, 전체 {len(text)}자) ..."
+    omitted = len(lines) - len(head) - len(tail)
+    return "\n".join(head + [f"... ({omitted}줄 생략, 전체 {len(lines)}줄) ..."] + tail)
+
+
+def _as_text(content) -> Optional[str]:
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        parts = [
+            part if isinstance(part, str) else part.get("text")
+            for part in content
+            if isinstance(part, str) or part.get("type") == "text"
+        ]
+        if len(parts) == len(content):
+            return "\n".join(parts)
+    # 이미지 등 텍스트가 아닌 블록은 자르지 않음
+    return None
+
+
+def apply_output_budget(tools, budgets: Optional[dict[str, int]] = None, default: int = DEFAULT_BUDGET):
+    """Wrap MCP tools so their text output never exceeds the token budget"""
+    if budgets is None:
+        budgets = parse_budgets(os.getenv("TOOL_OUTPUT_BUDGETS", ""))
+    by_name = {tool.name: tool for tool in tools}
+
+    def wrap(tool):
+        budget = budgets.get(tool.name, default)
+        summary_tool = by_name.get(SUMMARY_TOOLS.get(tool.name, ""))
+
+        async def run(**kwargs):
+            content, artifact = await tool.coroutine(**kwargs)
+            text = _as_text(content)
+            if text is None or estimate_tokens(text) <= budget:
+                return content, artifact
+
+            if summary_tool is None:
+                return head_tail(text, budget), artifact
+            # 같은 계산기의 요약을 붙이도록 calculator 인자는 그대로 전달
+            summary_args = {k: kwargs[k] for k in ("calculator",) if kwargs.get(k) is not None}
+            summary, _ = await summary_tool.coroutine(**summary_args)
+            summary = _as_text(summary) or ""
+            remaining = max(budget - estimate_tokens(summary), budget // 3)
+            return f"{head_tail(text, remaining)}\n\n[요약]\n{summary}", artifact
+
+        return StructuredTool(
+            name=tool.name,
+            description=tool.description,
+            args_schema=tool.args_schema,
+            coroutine=run,
+            response_format=tool.response_format,
+        )
+
+    return [wrap(tool) for tool in tools]
@@ -0,0 +1,26 @@
+import asyncio
+
+import pytest
+from fastmcp.exceptions import ToolError
+
+from calculator_mcp.embedded import EmbeddedConnection
+from calculator_mcp.server import state
+
+
+def _call(tool, **kwargs):
+    return asyncio.run(EmbeddedConnection().call(tool, **kwargs))
+
+
+def test_call_tool_with_name_argument():
+    previous = state.user_name
+    try:
+        assert "민수" in _call("set_user_name", name="민수")
+        assert state.user_name == "민수"
+    finally:
+        state.user_name = previous
+
+
+def test_call_validates_like_mcp():
+    assert _call("add", a="5", b=3) == "5.0 + 3.0 = 8.0"
+    with pytest.raises(ToolError):
+        _call("add", a=5)
@@ -0,0 +1,75 @@
+import asyncio
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+from calculator_mcp.model_router import Backend, RoutedChatModel
+
+ANSWER = "hello world answer"
+
+
+class CountingHandler(BaseCallbackHandler):
+    def __init__(self):
+        self.starts = 0
+        self.ends = 0
+        self.tokens: list[str] = []
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.starts += 1
+
+    def on_llm_end(self, response, **kwargs):
+        self.ends += 1
+
+    def on_llm_new_token(self, token, **kwargs):
+        self.tokens.append(token)
+
+
+def _router() -> RoutedChatModel:
+    def backend(name):
+        replies = iter([AIMessage(content=ANSWER)] * 10)
+        return Backend(name, GenericFakeChatModel(messages=replies))
+
+    return RoutedChatModel(backends=[backend("a"), backend("b")], hedge=False)
+
+
+def _run_in_node(call, handler: CountingHandler):
+    """그래프 노드처럼 상위 실행 안에서 호출 (콜백은 config가 아니라 context로 전달됨)"""
+    config = {"callbacks": [handler]}
+    if asyncio.iscoroutinefunction(call):
+        return asyncio.run(RunnableLambda(call).ainvoke("hi", config))
+    return RunnableLambda(call).invoke("hi", config)
+
+
+def test_invoke_reports_once():
+    handler = CountingHandler()
+    router = _router()
+    message = _run_in_node(lambda x: router.invoke(x), handler)
+    assert message.content == ANSWER
+    assert (handler.starts, handler.ends) == (1, 1)
+
+
+def test_ainvoke_reports_once():
+    handler = CountingHandler()
+    router = _router()
+
+    async def node(x):
+        return await router.ainvoke(x)
+
+    message = _run_in_node(node, handler)
+    assert message.content == ANSWER
+    assert (handler.starts, handler.ends) == (1, 1)
+
+
+def test_astream_streams_each_token_once():
+    handler = CountingHandler()
+    router = _router()
+
+    async def node(x):
+        return [chunk.content async for chunk in router.astream(x)]
+
+    chunks = _run_in_node(node, handler)
+    assert "".join(chunks) == ANSWER
+    assert "".join(handler.tokens) == ANSWER
+    assert (handler.starts, handler.ends) == (1, 1)
@@ -0,0 +1,30 @@
+import asyncio
+
+import mcp.types
+from fastmcp import Client
+
+from calculator_mcp.server import mcp as server
+
+
+def test_initialize_advertises_subscribe_and_sends_updates():
+    updated: list[str] = []
+
+    async def on_message(message):
+        if isinstance(message, mcp.types.ServerNotification):
+            notification = message.root
+            if isinstance(notification, mcp.types.ResourceUpdatedNotification):
+                updated.append(str(notification.params.uri))
+
+    async def run():
+        async with Client(server, message_handler=on_message) as client:
+            assert client.initialize_result.capabilities.resources.subscribe is True
+            await client.session.subscribe_resource("total://default")
+            await client.call_tool("add", {"a": 1, "b": 2})
+            for _ in range(50):
+                if updated:
+                    break
+                await asyncio.sleep(0.01)
+            await client.session.unsubscribe_resource("total://default")
+
+    asyncio.run(run())
+    assert updated == ["total://default"]